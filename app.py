@@ -8,7 +8,7 @@ import logging
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # 导入核心功能模块
-from core.utils import load_json_file, save_json_file, LogConfig
+from core.utils import load_json_file, load_json_records, save_json_file, LogConfig
 from core.asr_manager import ASRManager
 from audio_tools.core.audio_extractor import AudioExtractor
 from audio_tools.processing.transcription_processor import TranscriptionProcessor
@@ -83,7 +83,7 @@ def get_processed_files():
     output_folder = config.get("output_folder", "output")
     
     processed_record_file = os.path.join(output_folder, "processed_audio_files.json")
-    processed_files = load_json_file(processed_record_file)
+    processed_files = load_json_records(processed_record_file)
     
     # 格式化为前端所需的数据结构
     result = []
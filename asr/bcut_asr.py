@@ -3,9 +3,8 @@ import logging
 import time
 from typing import Optional, List, Dict, Union
 
-import requests
-
 from .base_asr import BaseASR, ASRDataSeg
+from .utils import get_http_session
 
 __version__ = "0.0.3"
 
@@ -33,7 +32,7 @@ class BcutASR(BaseASR):
 
     def __init__(self, audio_path: Union[str, bytes], use_cache: bool = False):
         super().__init__(audio_path, use_cache=use_cache)
-        self.session = requests.Session()
+        self.session = get_http_session()
         self.task_id = None
         self.__etags = []
 
@@ -61,7 +60,7 @@ class BcutASR(BaseASR):
             "model_id": "8",
         })
 
-        resp = requests.post(
+        resp = self.session.post(
             API_REQ_UPLOAD,
             data=payload,
             headers=self.headers
@@ -89,7 +88,7 @@ class BcutASR(BaseASR):
             start_range = clip * self.__per_size
             end_range = (clip + 1) * self.__per_size
             logging.info(f"开始上传分片{clip}: {start_range}-{end_range}")
-            resp = requests.put(
+            resp = self.session.put(
                 self.__upload_urls[clip],
                 data=self.file_binary[start_range:end_range],
                 headers=self.headers
@@ -108,7 +107,7 @@ class BcutASR(BaseASR):
             "UploadId": self.__upload_id,
             "model_id": "8",
         })
-        resp = requests.post(
+        resp = self.session.post(
             API_COMMIT_UPLOAD,
             data=data,
             headers=self.headers
@@ -120,7 +119,7 @@ class BcutASR(BaseASR):
 
     def create_task(self) -> str:
         """开始创建转换任务"""
-        resp = requests.post(
+        resp = self.session.post(
             API_CREATE_TASK, json={"resource": self.__download_url, "model_id": "8"}, headers=self.headers
         )
         resp.raise_for_status()
@@ -131,7 +130,7 @@ class BcutASR(BaseASR):
 
     def result(self, task_id: Optional[str] = None):
         """查询转换结果"""
-        resp = requests.get(API_QUERY_RESULT, params={"model_id": 7, "task_id": task_id or self.task_id}, headers=self.headers)
+        resp = self.session.get(API_QUERY_RESULT, params={"model_id": 7, "task_id": task_id or self.task_id}, headers=self.headers)
         resp.raise_for_status()
         resp = resp.json()
         return resp["data"]
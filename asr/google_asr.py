@@ -1,3 +1,4 @@
+import io
 import speech_recognition as sr
 import logging
 from typing import Union, List, Dict
@@ -33,10 +34,14 @@ class GoogleASR(BaseASR):
         recognizer = sr.Recognizer()
         
         try:
-            with sr.AudioFile(self.audio_path) as source:
+            # 直接使用已加载到内存的音频数据，避免再次读取文件
+            with sr.AudioFile(io.BytesIO(self.file_binary)) as source:
                 audio_data = recognizer.record(source)
                 text = recognizer.recognize_google(audio_data, language=self.language)
-                logging.info(f"Google API识别成功: {self.audio_path}")
+                if isinstance(self.audio_path, str):
+                    logging.info(f"Google API识别成功: {self.audio_path}")
+                else:
+                    logging.info("Google API识别成功")
                 return text
         except (sr.UnknownValueError, Exception) as e:
             logging.error(f"Google API识别失败: {str(e)}")
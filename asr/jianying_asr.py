@@ -6,11 +6,10 @@ import hmac
 import hashlib
 import logging
 import datetime
-import requests
 from typing import Dict, Tuple, Union, List
 
 from .base_asr import BaseASR, ASRDataSeg
-from .utils import sign, get_signature_key, aws_signature
+from .utils import sign, get_signature_key, aws_signature, get_http_session
 
 class JianYingASR(BaseASR):
     """剪映语音识别实现"""
@@ -52,7 +51,7 @@ class JianYingASR(BaseASR):
         sign, device_time = self._generate_sign_parameters(url='/lv/v1/audio_subtitle/submit', pf='4', appvr='4.0.0',
                                                            tdid=self.tdid)
         headers = self._build_headers(device_time, sign)
-        response = requests.post(url, json=payload, headers=headers)
+        response = get_http_session().post(url, json=payload, headers=headers)
         query_id = response.json()['data']['id']
         return query_id
 
@@ -75,7 +74,7 @@ class JianYingASR(BaseASR):
         sign, device_time = self._generate_sign_parameters(url='/lv/v1/audio_subtitle/query', pf='4', appvr='4.0.0',
                                                            tdid=self.tdid)
         headers = self._build_headers(device_time, sign)
-        response = requests.post(url, json=payload, headers=headers)
+        response = get_http_session().post(url, json=payload, headers=headers)
         return response.json()
 
     def _run(self, callback=None):
@@ -135,7 +134,7 @@ class JianYingASR(BaseASR):
             
             try:
                 # 设置较短的超时时间，避免长时间等待
-                response = requests.post(get_sign_url, json=data, timeout=3)
+                response = get_http_session().post(get_sign_url, json=data, timeout=3)
                 response.raise_for_status()
                 response_data = response.json()
                 sign = response_data.get('sign')
@@ -183,7 +182,7 @@ class JianYingASR(BaseASR):
         sign, device_time = self._generate_sign_parameters(url='/lv/v1/upload_sign', pf='4', appvr='4.0.0',
                                                            tdid=self.tdid)
         headers = self._build_headers(device_time, sign)
-        response = requests.post(url, data=payload, headers=headers)
+        response = get_http_session().post(url, data=payload, headers=headers)
         response.raise_for_status()
         login_data = response.json()
         self.access_key = login_data['data']['access_key_id']
@@ -209,7 +208,7 @@ class JianYingASR(BaseASR):
         signature = aws_signature(self.secret_key, request_parameters, headers, region="cn", service="vod")
         authorization = f"AWS4-HMAC-SHA256 Credential={self.access_key}/{datestamp}/cn/vod/aws4_request, SignedHeaders=x-amz-date;x-amz-security-token, Signature={signature}"
         headers["authorization"] = authorization
-        response = requests.get(f"https://vod.bytedanceapi.com/?{request_parameters}", headers=headers)
+        response = get_http_session().get(f"https://vod.bytedanceapi.com/?{request_parameters}", headers=headers)
         store_infos = response.json()
 
         self.store_uri = store_infos['Result']['UploadAddress']['StoreInfos'][0]['StoreUri']
@@ -224,7 +223,7 @@ class JianYingASR(BaseASR):
         """Upload the file"""
         url = f"https://{self.upload_hosts}/{self.store_uri}?partNumber=1&uploadID={self.upload_id}"
         headers = self._uplosd_headers()
-        response = requests.put(url, data=self.file_binary, headers=headers)
+        response = get_http_session().put(url, data=self.file_binary, headers=headers)
         resp_data = response.json()
         assert resp_data['success'] == 0, f"File upload failed: {response.text}"
         return resp_data
@@ -234,7 +233,7 @@ class JianYingASR(BaseASR):
         url = f"https://{self.upload_hosts}/{self.store_uri}?uploadID={self.upload_id}"
         payload = f"1:{self.crc32_hex}"
         headers = self._uplosd_headers()
-        response = requests.post(url, data=payload, headers=headers)
+        response = get_http_session().post(url, data=payload, headers=headers)
         resp_data = response.json()
         return resp_data
 
@@ -242,5 +241,5 @@ class JianYingASR(BaseASR):
         """Commit the uploaded file"""
         url = f"https://{self.upload_hosts}/{self.store_uri}?uploadID={self.upload_id}&partNumber=1&x-amz-security-token={self.session_token}"
         headers = self._uplosd_headers()
-        response = requests.put(url, data=self.file_binary, headers=headers)
+        response = get_http_session().put(url, data=self.file_binary, headers=headers)
         return self.store_uri
@@ -1,8 +1,8 @@
-import requests
 import logging
 from typing import Union, List, Dict
 
 from .base_asr import BaseASR, ASRDataSeg
+from .utils import get_http_session
 
 class KuaiShouASR(BaseASR):
     """快手语音识别实现"""
@@ -36,7 +36,7 @@ class KuaiShouASR(BaseASR):
                 "typeId": "1"
             }
             files = [('file', ('test.mp3', self.file_binary, 'audio/mpeg'))]
-            result = requests.post("https://ai.kuaishou.com/api/effects/subtitle_generate", data=payload, files=files)
+            result = get_http_session().post("https://ai.kuaishou.com/api/effects/subtitle_generate", data=payload, files=files)
             return result.json()
         except Exception as e:
             logging.error(f"快手ASR请求失败: {str(e)}")
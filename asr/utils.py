@@ -1,9 +1,65 @@
 import hmac
 import hashlib
+import subprocess
+import threading
+import wave
+from http.cookiejar import DefaultCookiePolicy
 from typing import Dict
-from pydub import AudioSegment
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# 每个线程各自的HTTP会话，按需创建
+_http_local = threading.local()
+
+def get_http_session() -> requests.Session:
+    """
+    获取当前线程的HTTP会话
+    
+    连接池按主机复用keep-alive连接，同一线程的后续请求无需重新进行TCP和TLS握手；
+    识别线程池的线程会被复用，会话随线程长期保留。每个线程独占自己的会话和连接池，
+    并发线程数超过连接池大小时不会丢弃连接，也不会在线程间共享会话状态；
+    会话不保存cookie，与逐次调用requests.post时的行为一致
+    
+    Returns:
+        当前线程的requests.Session
+    """
+    session = getattr(_http_local, 'session', None)
+    if session is None:
+        session = requests.Session()
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        # 单个线程同一时间只有一个请求，每个主机保留少量连接即可；
+        # 只对连接失败和幂等请求重试，POST请求不会被重复提交
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=2,
+                              max_retries=Retry(total=2, backoff_factor=0.2))
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _http_local.session = session
+    return session
+
 def get_audio_duration (audio_file: str) -> float:
-    """获取音频文件时长"""
+    """获取音频文件时长，优先只读取文件头，都失败时才完整解码"""
+    # PCM WAV(如分割出的片段)直接由文件头中的帧数和采样率计算
+    if audio_file.lower().endswith('.wav'):
+        try:
+            with wave.open(audio_file, 'rb') as f:
+                return f.getnframes() / f.getframerate()
+        except (wave.Error, EOFError, OSError):
+            pass
+    
+    # 其他格式用ffprobe读取容器信息
+    try:
+        output = subprocess.check_output(
+            ['ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+             '-of', 'default=nw=1:nk=1', audio_file],
+            stderr=subprocess.DEVNULL, universal_newlines=True, timeout=10
+        )
+        return float(output.strip())
+    except (OSError, subprocess.SubprocessError, ValueError):
+        pass
+    
+    from pydub import AudioSegment  # 延迟导入，签名工具函数不依赖pydub
     pydub_audio = AudioSegment.from_file(audio_file)
     return len(pydub_audio) / 1000
 
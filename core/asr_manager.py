@@ -1,6 +1,10 @@
 import os
+import socket
+import contextlib
 import logging
 import subprocess
+import concurrent.futures
+import threading
 import tempfile
 from typing import Dict, Tuple, List, Optional, Any, Type, Set, Callable
 import random
@@ -11,10 +15,26 @@ from asr import GoogleASR, JianYingASR, KuaiShouASR, BcutASR, ASRDataSeg, ASRSer
 class ASRManager:
     """
     ASR服务管理器，负责服务选择、失败处理和统计
+    
+    各ASR服务的上传、提交和轮询结果都是基于requests的阻塞调用，识别并发由调用方的线程池提供；
+    所有线程合计的在途请求数由max_inflight_requests限制，作用与异步实现中的信号量相同，
+    HTTP连接由共享会话的连接池复用(见 asr.utils.get_http_session)
     """
     
+    # 各ASR服务的接口主机，用于快速检查网络连通性
+    SERVICE_HOSTS = {
+        "Google": "www.google.com",
+        "剪映": "lv-pc-api-sinfonlinec.ulikecam.com",
+        "快手": "ai.kuaishou.com",
+        "B站": "member.bilibili.com",
+    }
+    
+    # 视频文件扩展名(小写)
+    VIDEO_EXTENSIONS = frozenset({'.mp4', '.avi', '.mov', '.mkv', '.flv', '.wmv', '.webm'})
+    
     def __init__(self, use_jianying_first: bool = False, 
-                 use_kuaishou: bool = False, use_bcut: bool = False):
+                 use_kuaishou: bool = False, use_bcut: bool = False,
+                 max_inflight_requests: Optional[int] = None):
         """
         初始化ASR服务管理器
         
@@ -22,11 +42,20 @@ class ASRManager:
             use_jianying_first: 是否优先使用剪映ASR
             use_kuaishou: 是否使用快手ASR
             use_bcut: 是否使用B站ASR
+            max_inflight_requests: 所有线程合计同时进行的识别请求上限，None表示不限制
         """
         self.use_jianying_first = use_jianying_first
         self.use_kuaishou = use_kuaishou
         self.use_bcut = use_bcut
         
+        # 多个文件并行转录时各自的线程池会叠加，用信号量限制同时在途的识别请求
+        self._inflight = threading.BoundedSemaphore(max_inflight_requests) if max_inflight_requests else None
+        
+        # 批量识别共用的线程池，首次批量识别时创建，避免每批都新建和销毁线程
+        self._batch_workers = max_inflight_requests or 32
+        self._batch_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._batch_executor_lock = threading.Lock()
+        
         # 创建ASR服务选择器
         self.selector = ASRServiceSelector()
         
@@ -72,17 +101,38 @@ class ASRManager:
         """
         self.selector.report_result(service_name, success)
     
-    def recognize_audio(self, audio_path: str, max_attempts: int = 3) -> Optional[str]:
+    def cache_fingerprint(self) -> str:
+        """
+        获取ASR服务配置的标识，服务配置不同时识别结果缓存互不共用
+        
+        Returns:
+            由服务启用和优先级设置组成的字符串
+        """
+        return (f"jianying_first={int(self.use_jianying_first)};"
+                f"kuaishou={int(self.use_kuaishou)};bcut={int(self.use_bcut)}")
+    
+    def recognize_audio(self, audio_path: str, max_attempts: int = 3,
+                        audio_data: Optional[bytes] = None) -> Optional[str]:
         """
         识别单个音频片段，尝试多个ASR服务
         
         Args:
             audio_path: 音频文件路径
             max_attempts: 最大尝试次数
+            audio_data: 调用方已读取的音频数据，提供时不再读取文件
             
         Returns:
             识别结果文本，失败返回None
         """
+        # 只读取一次音频数据，各服务的每次尝试直接复用内存中的数据
+        if audio_data is None:
+            try:
+                with open(audio_path, 'rb') as f:
+                    audio_data = f.read()
+            except OSError as e:
+                logging.error(f"读取音频文件失败: {audio_path} - {str(e)}")
+                return None
+        
         attempts = 0
         # 已尝试的服务，避免重复使用
         tried_services: Set[str] = set()
@@ -106,10 +156,11 @@ class ASRManager:
             logging.info(f"尝试使用 {name} ASR识别: {os.path.basename(audio_path)}")
             try:
                 # 创建ASR实例并识别
-                asr = service_class(audio_path)
-                segments = asr.get_result(
-                    callback=lambda p, m: logging.info(f"{name}识别进度: {p}% - {m}")
-                )
+                asr = service_class(audio_data)
+                with self._inflight or contextlib.nullcontext():
+                    segments = asr.get_result(
+                        callback=lambda p, m: logging.info(f"{name}识别进度: {p}% - {m}")
+                    )
                 
                 if segments:
                     result_text = " ".join([seg.text for seg in segments if seg.text])
@@ -131,6 +182,72 @@ class ASRManager:
         logging.error(f"所有ASR服务均未能识别: {os.path.basename(audio_path)}")
         return None
     
+    def recognize_batch(self, audio_paths: List[str], max_attempts: int = 3) -> List[Optional[str]]:
+        """
+        识别一批音频片段
+        
+        目前接入的ASR服务都是远程HTTP接口且只提供单文件接口，因此整批片段以单文件请求
+        在共用线程池中并发发出，批次耗时约等于其中最慢的片段而不是各片段之和；
+        接入支持批量接口的服务或本地批量推理模型时，在此处将整批片段合并为一次请求
+        
+        Args:
+            audio_paths: 音频文件路径列表
+            max_attempts: 每个片段的最大尝试次数
+        
+        Returns:
+            与audio_paths顺序一致的识别结果列表，失败的片段为None
+        """
+        if len(audio_paths) <= 1:
+            return [self.recognize_audio(audio_path, max_attempts) for audio_path in audio_paths]
+        
+        # 批内第一个片段在当前线程识别，其余交给共用线程池
+        executor = self._get_batch_executor()
+        futures = [executor.submit(self.recognize_audio, path, max_attempts) for path in audio_paths[1:]]
+        first = self.recognize_audio(audio_paths[0], max_attempts)
+        return [first] + [future.result() for future in futures]
+    
+    def _get_batch_executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        """获取批量识别共用的线程池，不存在时创建"""
+        if self._batch_executor is None:
+            with self._batch_executor_lock:
+                if self._batch_executor is None:
+                    self._batch_executor = concurrent.futures.ThreadPoolExecutor(
+                        max_workers=self._batch_workers, thread_name_prefix="asr_batch")
+        return self._batch_executor
+    
+    def close(self):
+        """关闭批量识别线程池"""
+        with self._batch_executor_lock:
+            if self._batch_executor is not None:
+                self._batch_executor.shutdown(wait=False, cancel_futures=True)
+                self._batch_executor = None
+    
+    def check_connectivity(self, timeout: float = 1.0) -> Dict[str, bool]:
+        """
+        并发检查已注册ASR服务的接口主机能否建立TCP连接
+        
+        Args:
+            timeout: 每个连接的超时时间(秒)
+            
+        Returns:
+            服务名称到是否可连接的映射
+        """
+        def can_connect(host: str) -> bool:
+            try:
+                socket.create_connection((host, 443), timeout=timeout).close()
+                return True
+            except OSError:
+                return False
+        
+        hosts = {name: self.SERVICE_HOSTS[name] for name in self.get_service_stats()
+                 if name in self.SERVICE_HOSTS}
+        if not hosts:
+            return {}
+        
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(hosts)) as executor:
+            results = dict(zip(hosts, executor.map(can_connect, hosts.values())))
+        return results
+    
     def get_service_stats(self) -> Dict[str, Dict[str, Any]]:
         """
         获取服务使用统计数据
@@ -150,9 +267,7 @@ class ASRManager:
         Returns:
             是否为视频文件
         """
-        video_extensions = {'.mp4', '.avi', '.mov', '.mkv', '.flv', '.wmv', '.webm'}
-        _, ext = os.path.splitext(file_path.lower())
-        return ext in video_extensions
+        return os.path.splitext(file_path)[1].lower() in self.VIDEO_EXTENSIONS
         
     def extract_audio_from_video(self, video_path: str) -> str:
         """
@@ -171,12 +286,13 @@ class ASRManager:
         audio_path = os.path.join(temp_dir, audio_filename)
         
         try:
-            # 使用FFmpeg提取音频
+            # 使用FFmpeg提取音频，直接输出ASR所需的单声道16kHz PCM，
+            # 与分割出的片段格式一致，上传体积更小，服务端也无需再重采样
             cmd = [
                 'ffmpeg',
                 '-i', video_path,
-                '-q:a', '0',
                 '-map', 'a',
+                '-ac', '1', '-ar', '16000', '-c:a', 'pcm_s16le',
                 '-y',  # 覆盖已存在的文件
                 audio_path
             ]
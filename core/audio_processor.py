@@ -1,31 +1,51 @@
 import os
 import tempfile
-import shutil
 import time
 import concurrent.futures
+import json
 import logging
-import requests
 import signal
-from typing import Dict, List, Set, Tuple, Optional, Any, Callable
+import threading
+import contextlib
+import functools
+import collections
+import atexit
+import weakref
+import queue
+from typing import Dict, List, Set, Tuple, Optional, Any, Callable, TextIO, TYPE_CHECKING
 from pathlib import Path
-from pydub import AudioSegment
 import subprocess
-from tqdm import tqdm
 
 # 导入工具函数 - 使用相对导入
-from .utils import format_time_duration, load_json_file, save_json_file, ProgressBar, LogConfig
+from .utils import format_time_duration, now_str, load_json_records, save_json_file, write_text_atomic, AtomicTextWriter, fast_rmtree, ProgressBar, LogConfig
 
 # 导入ASR模块和ASR管理器
 from .asr import ASRDataSeg
 from .asr_manager import ASRManager
-from .text_formatter import TextFormatter
+from .text_formatter import OrderedSegmentWriter
 from .progress_manager import ProgressManager
-from .audio_splitter import AudioSplitter
-from .transcription_manager import TranscriptionManager  # 导入TranscriptionManager
+from .audio_splitter import AudioSplitter, split_audio_in_process, audio_duration_in_process
+from .transcription_manager import TranscriptionManager, default_max_workers  # 导入TranscriptionManager
+
+if TYPE_CHECKING:
+    from pydub import AudioSegment
+
+def _call_if_alive(method_ref: weakref.WeakMethod):
+    """调用弱引用的方法，对象已被回收时不做任何事"""
+    method = method_ref()
+    if method is not None:
+        method()
 
 class AudioProcessor:
     """音频处理类，负责音频分割、转写和文本整合"""
     
+    # 处理记录批量写盘阈值：累计变更数或距上次写盘的秒数
+    RECORDS_FLUSH_BATCH = 10
+    RECORDS_FLUSH_INTERVAL = 5.0
+    
+    # 所有实例共享的后台清理线程，用于删除已移出的临时目录
+    _cleanup_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="temp_cleanup")
+    
     def __init__(self, **kwargs):
         """
         音频处理器初始化
@@ -38,6 +58,8 @@ class AudioProcessor:
         self.output_folder = kwargs.get('output_folder', './output')
         self.max_retries = kwargs.get('max_retries', 3)
         self.max_workers = kwargs.get('max_workers', 4)
+        # 每个文件的片段识别线程数，默认与max_workers相同；传入None时按 default_max_workers 自动确定
+        self.segment_workers = kwargs.get('segment_workers', self.max_workers) or default_max_workers()
         self.use_jianying_first = kwargs.get('use_jianying_first', True)
         self.use_kuaishou = kwargs.get('use_kuaishou', True)
         self.use_bcut = kwargs.get('use_bcut', True)
@@ -45,21 +67,44 @@ class AudioProcessor:
         self.include_timestamps = kwargs.get('include_timestamps', True)
         self.show_progress = kwargs.get('show_progress', True)
         self.process_video = kwargs.get('process_video', True)
-        self.video_extensions = kwargs.get('video_extensions', ['.mp4', '.mov', '.avi'])
+        # 统一小写并使用frozenset，扩展名判断为一次哈希查找
+        self.video_extensions = frozenset(ext.lower() for ext in kwargs.get('video_extensions', ['.mp4', '.mov', '.avi']))
         self.extract_audio_only = kwargs.get('extract_audio_only', False)
+        # 转录视频时是否直接从视频提取并分割音频，不生成完整的中间音频文件
+        self.fuse_video_split = kwargs.get('fuse_video_split', True)
         # 创建输出目录
         os.makedirs(self.output_folder, exist_ok=True)
         
+        # 输出目录文件名缓存，代替逐个文件的os.path.exists调用
+        self._output_entries: Set[str] = set()
+        self._refresh_output_entries()
+        
         # 记录文件路径
         self.processed_record_file = os.path.join(self.output_folder, "processed_audio_files.json")
-        self.processed_files = load_json_file(self.processed_record_file)
+        self.processed_files = load_json_records(self.processed_record_file)
+        # 已处理文件名集合，供批量过滤视频时使用，在保存记录时更新
+        self._processed_basenames: Set[str] = {os.path.basename(path) for path in self.processed_files}
+        
+        # 处理记录的变更以追加方式写入日志文件，每次只写入变更的条目；
+        # 启动时合并日志到JSON快照，退出时确保写入未保存的变更
+        self._records_lock = threading.Lock()
+        self._dirty_paths: Set[str] = set()
+        self._last_records_flush = time.monotonic()
+        self._records_journal = self.processed_record_file + '.jsonl'
+        # 日志文件在首次使用时打开，cleanup中关闭后再次处理时重新打开
+        self._record_fp: Optional[TextIO] = None
+        self._compact_processed_records()
+        # atexit只持有弱引用，不会让处理器及其线程池、临时目录在解释器退出前一直无法回收
+        atexit.register(_call_if_alive, weakref.WeakMethod(self._flush_processed_records))
         
-        # 初始化中断信号处理
+        # 初始化中断标志，信号处理程序在process_all_files中按需安装
         self.interrupt_received = False
-        self.original_sigint_handler = signal.getsignal(signal.SIGINT)
         
-        # 临时目录
-        self.temp_dir = tempfile.mkdtemp()
+        # 临时目录，由TemporaryDirectory托管：即使未调用cleanup，对象回收或解释器退出时也会删除
+        self._temp_dir_ctx = tempfile.TemporaryDirectory(prefix="asr_", ignore_cleanup_errors=True)
+        self.temp_dir = self._temp_dir_ctx.name
+        # cleanup时是否在后台删除临时目录，为False时同步删除，cleanup返回后目录已不存在
+        self.async_cleanup = kwargs.get('async_cleanup', True)
         self.temp_segments_dir = os.path.join(self.temp_dir, "segments")
         os.makedirs(self.temp_segments_dir, exist_ok=True)
         
@@ -67,22 +112,48 @@ class AudioProcessor:
         self.asr_manager = ASRManager(
             use_jianying_first=self.use_jianying_first,
             use_kuaishou=self.use_kuaishou,
-            use_bcut=self.use_bcut
+            use_bcut=self.use_bcut,
+            # 文件级和片段级线程池嵌套时最多可有max_workers×segment_workers个请求，限制为2倍segment_workers
+            max_inflight_requests=kwargs.get('max_inflight_requests', self.segment_workers * 2)
         )
         
         # 初始化进度条管理器
         self.progress_manager = ProgressManager(show_progress=self.show_progress)
         
         # 初始化音频分割器
-        self.audio_splitter = AudioSplitter(self.temp_segments_dir)
+        self.audio_splitter = AudioSplitter(
+            self.temp_segments_dir,
+            use_ffmpeg_segment=kwargs.get('use_ffmpeg_segment', True)  # False时使用pydub逐段导出
+        )
+        
+        # pydub分割在Python中逐段切片导出，受GIL限制，交给进程池按CPU核数并行；
+        # FFmpeg分割本身在子进程中运行，无需进程池
+        # 进程池在首次使用时创建，cleanup中关闭后再次处理时重新创建；进程数为0表示不使用进程池
+        split_processes = kwargs.get('split_processes', os.cpu_count() or 1)
+        self._split_processes = (split_processes
+                                 if split_processes > 1 and not self.audio_splitter.use_ffmpeg_segment else 0)
+        self._split_pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        self._split_pool_lock = threading.Lock()
 
+        # 进度渲染队列，分割/提取/转录线程只负责投递进度，由单独线程刷新进度条
+        self._progress_queue: queue.Queue = queue.Queue(maxsize=1024)
+        self._progress_thread: Optional[threading.Thread] = None
+        self._progress_thread_lock = threading.Lock()
+        
         # 初始化转录管理器
         self.transcription_manager = TranscriptionManager(
             asr_manager=self.asr_manager,
             temp_segments_dir=self.temp_segments_dir,
-            max_workers=self.max_workers,
+            max_workers=self.segment_workers,
             max_retries=self.max_retries,
-            progress_callback=self.transcription_progress_callback
+            # 转录管理器按 (current, total, message) 回调，这里绑定识别状态；
+            # 进度条只在渲染线程中更新，各文件的识别调度线程不争用进度条
+            progress_callback=self._queued_progress(
+                functools.partial(self.transcription_progress_callback, 'recognize')),
+            batch_size=kwargs.get('asr_batch_size', 1),  # 每次提交给ASR的片段数
+            # 传入asr_cache_file时按片段内容缓存识别结果，重新处理时已识别的片段不再请求ASR；默认不缓存
+            cache_file=kwargs.get('asr_cache_file'),
+            cache_max_entries=kwargs.get('asr_cache_max_entries', 100000)
         )
         
         # 分段处理相关参数
@@ -92,6 +163,43 @@ class AudioProcessor:
         # 添加音频时长阈值参数，默认15分钟(900秒)
         self.part_processing_threshold = kwargs.get('part_processing_threshold', 900)
         
+        # 视频音频提取线程池，FFmpeg提取与转录并行进行
+        # 线程数可通过 extract_workers 参数或 AUDIO_EXTRACT_WORKERS 环境变量设置
+        self.extract_workers = (kwargs.get('extract_workers')
+                                or int(os.environ.get('AUDIO_EXTRACT_WORKERS', 0))
+                                or min(os.cpu_count() or 1, 8))
+        # 最多提前提取的音频数，避免已提取但未转录的音频堆积
+        self.max_inflight_extractions = kwargs.get('max_inflight_extractions', self.extract_workers)
+        self._extract_pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.extract_workers, thread_name_prefix="extract")
+        self._extract_slots = threading.BoundedSemaphore(self.max_inflight_extractions)
+        
+        # 文件级线程池，首次使用时创建，供同一实例的多次调用复用，在cleanup中关闭
+        self._file_pool: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._file_pool_lock = threading.Lock()
+        self._prefetch_lock = threading.Lock()
+        self._prefetch_queue: collections.deque = collections.deque()
+        self._pending_extractions: Dict[str, concurrent.futures.Future] = {}
+        
+        # 后台删除队列，转录完成后的文件删除不阻塞工作线程
+        self._delete_queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._delete_thread: Optional[threading.Thread] = None
+        self._delete_thread_lock = threading.Lock()
+        
+        # 扩展名到处理方法的分派表
+        self._handlers: Dict[str, Callable] = {ext: self._handle_video for ext in self.video_extensions}
+        self._handlers['.mp3'] = self._handle_audio
+        
+        # 音频时长缓存，以及获取时长时解码的音频（交给随后的分割复用，避免重复解码）
+        self._audio_durations: Dict[str, float] = {}
+        self._decoded_audio: Dict[str, "AudioSegment"] = {}
+        # 视频直接提取并分割得到的片段，键为对应的音频记录路径
+        self._presplit_segments: Dict[str, List[str]] = {}
+        # 各文件片段所在的子目录(每次分割新建)，文件转录结束后整体删除
+        self._segment_dirs: Dict[str, str] = {}
+        # 转录状态到 (进度条名称, 前缀) 的缓存
+        self._progress_names: Dict[str, Tuple[str, str]] = {'recognize': ('recognize_progress', "识别进度")}
+        
     # 新增的转录进度回调方法
     def transcription_progress_callback(self, state: str, current: int, total: int, message: str):
         """
@@ -103,17 +211,11 @@ class AudioProcessor:
             total: 总数
             message: 显示消息
         """
-        # 根据状态决定使用哪个进度条
-        if state == 'recognize':
-            progress_name = 'recognize_progress'
-            prefix = "识别进度"
-        elif state.startswith('retry_'):
-            retry_round = state.split('_')[1]
-            progress_name = f'retry_{retry_round}_progress'
-            prefix = f"重试 #{retry_round}"
-        else:
-            progress_name = 'unknown_progress'
-            prefix = "处理中"
+        # 根据状态决定使用哪个进度条，名称和前缀按状态缓存，避免每次回调重新拼接字符串
+        names = self._progress_names.get(state)
+        if names is None:
+            names = self._progress_names[state] = self._progress_names_for(state)
+        progress_name, prefix = names
         
         # 如果进度条不存在，创建它
         if not self.progress_manager.has_progress_bar(progress_name):
@@ -125,6 +227,98 @@ class AudioProcessor:
         else:
             self.update_progress(progress_name, current, message)
     
+    @staticmethod
+    def _progress_names_for(state: str) -> Tuple[str, str]:
+        """
+        获取转录状态对应的进度条名称和前缀
+        
+        Args:
+            state: 当前状态 (recognize, retry_1, retry_2...)
+            
+        Returns:
+            (进度条名称, 进度条前缀)
+        """
+        if state == 'recognize':
+            return 'recognize_progress', "识别进度"
+        if state.startswith('retry_'):
+            retry_round = state.split('_')[1]
+            return f'retry_{retry_round}_progress', f"重试 #{retry_round}"
+        return 'unknown_progress', "处理中"
+    
+    def _queued_progress(self, callback: Callable) -> Callable:
+        """
+        包装进度回调，使其通过进度队列在渲染线程中执行
+        
+        Args:
+            callback: 接受 (current, total, message) 的进度回调
+            
+        Returns:
+            投递到进度队列的回调函数
+        """
+        if not self.show_progress:
+            return callback
+        
+        def enqueue(current: int, total: int, message: str):
+            # 渲染线程按需启动，cleanup停止后再次投递时重新启动
+            thread = self._progress_thread
+            if thread is None or not thread.is_alive():
+                self._start_progress_drain()
+            item = (callback, current, total, message)
+            if current >= total:
+                # 完成消息不可丢弃
+                self._progress_queue.put(item)
+                return
+            try:
+                self._progress_queue.put_nowait(item)
+            except queue.Full:
+                pass  # 队列已满时丢弃中间进度，后续进度会覆盖
+        
+        return enqueue
+    
+    def _start_progress_drain(self):
+        """按需启动进度渲染线程"""
+        with self._progress_thread_lock:
+            if self._progress_thread is None or not self._progress_thread.is_alive():
+                self._progress_thread = threading.Thread(target=self._progress_drain, name="progress_drain", daemon=True)
+                self._progress_thread.start()
+    
+    def _progress_drain(self):
+        """进度渲染线程，收到None时退出"""
+        while True:
+            # 一次取出已排队的全部进度，积压时可合并同一回调的中间进度
+            batch = [self._progress_queue.get()]
+            while batch[-1] is not None:
+                try:
+                    batch.append(self._progress_queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            for i, item in enumerate(batch):
+                if item is None:
+                    return
+                callback, current, total, message = item
+                # 紧随其后的是同一回调的进度时，未完成的中间进度无需渲染
+                following = batch[i + 1] if i + 1 < len(batch) else None
+                if current < total and following is not None and following[0] is callback:
+                    continue
+                try:
+                    callback(current, total, message)
+                except Exception as e:
+                    logging.warning(f"进度回调出错: {str(e)}")
+    
+    def _stop_progress_drain(self, timeout: float = 2.0):
+        """
+        通知进度渲染线程处理完剩余进度后退出
+        
+        Args:
+            timeout: 最长等待时间(秒)
+        """
+        with self._progress_thread_lock:
+            if self._progress_thread is None or not self._progress_thread.is_alive():
+                return
+            self._progress_queue.put(None)
+            self._progress_thread.join(timeout=timeout)
+    
     # 使用ProgressManager替换原有的进度条方法
     def create_progress_bar(self, name: str, total: int, prefix: str, suffix: str = "") -> Optional[ProgressBar]:
         """创建并存储一个进度条"""
@@ -167,9 +361,155 @@ class AudioProcessor:
                 
             return None
     
-    def _save_processed_records(self):
-        """保存已处理文件记录"""
-        save_json_file(self.processed_record_file, self.processed_files)
+    def _refresh_output_entries(self):
+        """使用一次scandir刷新输出目录文件名缓存"""
+        with os.scandir(self.output_folder) as entries:
+            self._output_entries = {entry.name for entry in entries}
+    
+    def _record_output(self, path: str):
+        """记录新写入输出目录的文件"""
+        if os.path.dirname(path) == self.output_folder:
+            self._output_entries.add(os.path.basename(path))
+    
+    def _is_processed(self, path: str) -> bool:
+        """检查文件是否在处理记录中且不是中断状态"""
+        record = self.processed_files.get(path)
+        return record is not None and not record.get('interrupted', False)
+    
+    def _prefetch_extractions(self):
+        """在空闲槽位内提前提交后续视频的音频提取任务"""
+        with self._prefetch_lock:
+            while self._prefetch_queue and not self.interrupt_received:
+                # 非阻塞获取槽位，槽位在对应文件转录结束后释放
+                if not self._extract_slots.acquire(blocking=False):
+                    break
+                filename = self._prefetch_queue.popleft()
+                self._pending_extractions[filename] = self._extract_pool.submit(
+                    self._prepare_video_audio, os.path.join(self.media_folder, filename))
+    
+    def _take_extraction(self, filename: str) -> Optional[concurrent.futures.Future]:
+        """
+        取出视频已提前提交的提取任务
+        
+        Args:
+            filename: 视频文件名
+            
+        Returns:
+            提取任务，未提前提交时返回None（并从预提取队列中移除）
+        """
+        with self._prefetch_lock:
+            future = self._pending_extractions.pop(filename, None)
+            if future is None and filename in self._prefetch_queue:
+                self._prefetch_queue.remove(filename)
+            return future
+    
+    def _schedule_delete(self, path: str):
+        """
+        将文件交给后台线程删除
+        
+        Args:
+            path: 要删除的文件路径
+        """
+        with self._delete_thread_lock:
+            if self._delete_thread is None or not self._delete_thread.is_alive():
+                self._delete_thread = threading.Thread(target=self._delete_worker, name="file_delete", daemon=True)
+                self._delete_thread.start()
+        self._delete_queue.put(path)
+    
+    def _delete_worker(self):
+        """后台删除线程，收到None时退出"""
+        while True:
+            path = self._delete_queue.get()
+            if path is None:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logging.warning(f"删除文件失败: {path} - {str(e)}")
+    
+    def _stop_delete_worker(self, timeout: float = 2.0):
+        """
+        通知后台删除线程处理完剩余文件后退出
+        
+        Args:
+            timeout: 最长等待时间(秒)
+        """
+        with self._delete_thread_lock:
+            if self._delete_thread is None or not self._delete_thread.is_alive():
+                return
+            self._delete_queue.put(None)
+            self._delete_thread.join(timeout=timeout)
+            if self._delete_thread.is_alive():
+                logging.warning("⚠️ 后台删除文件超时，部分已提取的音频可能未删除")
+    
+    def _is_completed(self, path: str) -> bool:
+        """检查文件是否已全部处理完成"""
+        record = self.processed_files.get(path)
+        return record is not None and record.get("completed", False)
+    
+    def _save_processed_records(self, path: Optional[str] = None):
+        """
+        将变更的处理记录追加写入日志文件
+        
+        Args:
+            path: 本次变更的文件路径，会与之前累计的变更一起写入
+        """
+        with self._records_lock:
+            if path is not None:
+                self._dirty_paths.add(path)
+            # 累计的变更拼成一次写入，行缓冲文件每次write都会刷盘
+            lines = []
+            for dirty_path in self._dirty_paths:
+                record = self.processed_files.get(dirty_path)
+                if record is not None:
+                    lines.append(json.dumps({dirty_path: record}, ensure_ascii=False) + '\n')
+                self._processed_basenames.add(os.path.basename(dirty_path))
+            if lines:
+                self._open_records_journal().write(''.join(lines))
+            self._dirty_paths.clear()
+            self._last_records_flush = time.monotonic()
+    
+    def _mark_dirty(self, path: str):
+        """
+        标记处理记录有变更，累计到一定数量或超过写盘间隔时才保存
+        
+        Args:
+            path: 变更的文件路径
+        """
+        with self._records_lock:
+            self._dirty_paths.add(path)
+            flush_due = (len(self._dirty_paths) >= self.RECORDS_FLUSH_BATCH or
+                         time.monotonic() - self._last_records_flush > self.RECORDS_FLUSH_INTERVAL)
+        if flush_due:
+            self._save_processed_records()
+    
+    def _flush_processed_records(self):
+        """保存尚未写盘的处理记录变更"""
+        if self._dirty_paths:
+            self._save_processed_records()
+    
+    def _compact_processed_records(self):
+        """将全部处理记录写入JSON快照，并清空追加日志；日志为空时快照已是最新，不再重写"""
+        with self._records_lock:
+            record_fp = self._open_records_journal()
+            if record_fp.tell() == 0:
+                return
+            if save_json_file(self.processed_record_file, self.processed_files):
+                record_fp.seek(0)
+                record_fp.truncate()
+    
+    def _open_records_journal(self) -> TextIO:
+        """
+        获取处理记录日志文件，未打开时以追加方式打开，调用方需持有_records_lock
+        
+        Returns:
+            行缓冲的日志文件对象
+        """
+        if self._record_fp is None:
+            self._record_fp = open(self._records_journal, 'a', encoding='utf-8', buffering=1)
+        return self._record_fp
     
     def handle_interrupt(self, sig, frame):
         """处理中断信号"""
@@ -179,6 +519,25 @@ class AudioProcessor:
         self.transcription_manager.set_interrupt_flag(True)
         # 不立即退出，允许程序完成当前处理和清理
     
+    @contextlib.contextmanager
+    def _sigint_guard(self):
+        """
+        在作用域内安装SIGINT处理程序，退出时恢复原处理程序
+        
+        signal.signal只能在主线程调用，在其他线程（如Web应用内嵌）中使用时
+        不安装处理程序，中断改由interrupt_received标志协作完成
+        """
+        if threading.current_thread() is not threading.main_thread():
+            yield
+            return
+        
+        original_handler = signal.getsignal(signal.SIGINT)
+        signal.signal(signal.SIGINT, self.handle_interrupt)
+        try:
+            yield
+        finally:
+            signal.signal(signal.SIGINT, original_handler)
+    
     def split_audio_file(self, input_path: str, segment_length: int = 30) -> List[str]:
         """
         将单个音频文件分割为较小片段
@@ -190,6 +549,11 @@ class AudioProcessor:
         Returns:
             分割后的片段文件列表
         """
+        # 视频已在提取时直接分割为片段
+        segment_files = self._presplit_segments.pop(input_path, None)
+        if segment_files:
+            return segment_files
+        
         filename = os.path.basename(input_path)
         
         # 创建进度条，但先不更新
@@ -201,32 +565,92 @@ class AudioProcessor:
             suffix="准备中"
         )
         
-        # 定义进度回调函数
-        def progress_callback(current: int, total: int, message: str):
-            # 第一次调用时更新进度条总数
-            if current == 0 and hasattr(self, "progress_manager") and progress_name in self.progress_manager.progress_bars:
-                self.progress_manager.progress_bars[progress_name].total = total
-            
-            self.update_progress(progress_name, current, message)
-            
-            # 如果是结束消息，完成进度条
-            if current >= total:
-                self.finish_progress(progress_name, message)
+        if self._split_processes:
+            return self._track_segment_dir(
+                input_path, self._split_in_pool(input_path, segment_length, progress_name))
         
-        # 设置音频分割器的回调
-        self.audio_splitter.progress_callback = progress_callback
-        
-        # 使用安全执行器处理错误
+        # 使用安全执行器处理错误，回调按调用传入以支持多文件并发分割
         result = self.safe_execute(
             self.audio_splitter.split_audio_file,
             error_msg=f"分割音频文件 {filename} 失败",
             progress_name=progress_name,
             input_path=input_path,
-            segment_length=segment_length
+            segment_length=segment_length,
+            progress_callback=self._queued_progress(
+                functools.partial(self._split_progress_callback, progress_name=progress_name)),
+            audio=self._decoded_audio.pop(input_path, None),
+            duration=self._audio_durations.get(input_path)
         )
         
+        return self._track_segment_dir(input_path, result or [])
+    
+    def _track_segment_dir(self, audio_path: str, segment_files: List[str]) -> List[str]:
+        """
+        记录文件片段所在的子目录，转录结束后由transcribe_audio整体删除
+        
+        Args:
+            audio_path: 音频记录路径
+            segment_files: 相对temp_segments_dir的片段文件列表
+            
+        Returns:
+            传入的片段文件列表
+        """
+        if segment_files:
+            self._segment_dirs[audio_path] = os.path.dirname(segment_files[0])
+        return segment_files
+    
+    def _split_in_pool(self, input_path: str, segment_length: int, progress_name: str) -> List[str]:
+        """
+        在进程池中分割音频，子进程无法回传进度，只在结束时更新进度条
+        
+        Args:
+            input_path: 输入音频文件路径
+            segment_length: 每个片段的长度(秒)
+            progress_name: 对应的进度条名称
+            
+        Returns:
+            分割后的片段文件列表
+        """
+        filename = os.path.basename(input_path)
+        # 子进程自行解码，释放本进程中缓存的解码结果
+        self._decoded_audio.pop(input_path, None)
+        
+        self.update_progress(progress_name, 0, "子进程分割中")
+        future = self._get_split_pool().submit(
+            split_audio_in_process, input_path, self.temp_segments_dir, segment_length,
+            use_ffmpeg_segment=False)
+        result = self.safe_execute(
+            future.result,
+            error_msg=f"分割音频文件 {filename} 失败",
+            progress_name=progress_name
+        )
+        
+        if result:
+            self.finish_progress(progress_name, f"完成 - {len(result)} 个片段")
         return result or []
     
+    def _split_progress_callback(self, current: int, total: int, message: str, progress_name: str):
+        """
+        音频分割进度回调
+        
+        Args:
+            current: 当前进度
+            total: 总数
+            message: 显示消息
+            progress_name: 对应的进度条名称
+        """
+        # 第一次调用时更新进度条总数
+        if current == 0:
+            progress_bar = self.progress_manager.get_progress_bar(progress_name)
+            if progress_bar is not None:
+                progress_bar.total = total
+        
+        self.update_progress(progress_name, current, message)
+        
+        # 如果是结束消息，完成进度条
+        if current >= total:
+            self.finish_progress(progress_name, message)
+    
     def recognize_audio(self, audio_path: str) -> Optional[str]:
         """
         识别单个音频片段
@@ -257,70 +681,70 @@ class AudioProcessor:
         Returns:
             合并格式化后的文本
         """
-        # 按顺序合并所有文本片段
-        all_text = []
-        all_timestamps = []
+        total = len(segment_files)
+        missing = total - len(segment_results)
+        logging.info(f"生成文本: {total} 个片段" + (f"，{missing} 个未识别" if missing > 0 else ""))
         
-        # 显示文本准备进度条
-        text_prep_name = "text_preparation"
-        self.create_progress_bar(
-            text_prep_name,
-            total=len(segment_files),
-            prefix="文本准备",
-            suffix="处理中"
+        # 与整体处理时的流式输出共用格式化逻辑：只遍历已识别的片段，不再为缺失片段构造占位文本
+        parts: List[str] = []
+        writer = OrderedSegmentWriter(
+            parts.append,
+            total,
+            format_text=self.format_text,
+            include_timestamps=self.include_timestamps,
+            segment_length=30,  # 每个片段30秒
+            start_index=start_segment  # 考虑当前部分的起始位置，保证时间戳连续
         )
+        for i in sorted(segment_results):
+            writer.add(i, segment_results[i])
+        writer.close()
         
-        for i in range(len(segment_files)):
-            # 计算全局时间戳索引 (考虑当前部分的起始位置)
-            global_idx = start_segment + i
-            
-            if i in segment_results:
-                all_text.append(segment_results[i])
-                # 计算连续的时间戳，每个片段30秒
-                all_timestamps.append({
-                    'start': global_idx * 30,
-                    'end': (global_idx + 1) * 30
-                })
-            else:
-                all_text.append("[无法识别的音频片段]")
-                all_timestamps.append({
-                    'start': global_idx * 30,
-                    'end': (global_idx + 1) * 30
-                })
-                
-            # 更新进度条
-            self.update_progress(
-                text_prep_name, 
-                i + 1, 
-                f"处理片段 {i+1}/{len(segment_files)}"
-            )
+        return "".join(parts)
+    
+    def get_output_subfolder(self, base_name: str) -> str:
+        """
+        获取文件结果的输出目录
         
-        # 完成文本准备进度条
-        self.finish_progress(text_prep_name, "文本片段处理完成")
-        
-        # 格式化文本以提高可读性
-        if self.format_text:
-            format_name = "format_text"
-            self.create_progress_bar(
-                format_name,
-                total=1,
-                prefix="格式化文本",
-                suffix="处理中"
-            )
+        结果文本与各部分文本平铺在output_folder中(初始化时已创建)，与跳过检查使用的输出目录文件名缓存一致
+        
+        Args:
+            base_name: 不含扩展名的文件名
             
-            full_text = TextFormatter.format_segment_text(
-                all_text, 
-                timestamps=all_timestamps if self.include_timestamps else None,
-                include_timestamps=self.include_timestamps,
-                separate_segments=True  # 启用分片分隔
-            )
+        Returns:
+            输出目录路径
+        """
+        return self.output_folder
+    
+    def _result_text_path(self, base_name: str) -> str:
+        """
+        获取音频文件对应的结果文本路径
+        
+        Args:
+            base_name: 不含扩展名的音频文件名
             
-            self.finish_progress(format_name, "格式化完成")
-        else:
-            # 如果不格式化，仍使用原来的合并方式
-            full_text = "\n\n".join([text for text in all_text if text and text != "[无法识别的音频片段]"])
+        Returns:
+            结果文本文件路径
+        """
+        # 获取子文件夹路径
+        output_subfolder = self.get_output_subfolder(base_name)
+        return os.path.join(output_subfolder, f"{base_name}.txt")
+    
+    def _partial_results_path(self, base_name: str) -> str:
+        """
+        获取音频文件的片段结果日志路径，识别被中断时保留已识别的片段，文件完成后删除
         
-        return full_text
+        Args:
+            base_name: 不含扩展名的音频文件名
+            
+        Returns:
+            片段结果日志(JSONL)路径
+        """
+        return os.path.join(self.get_output_subfolder(base_name), f"{base_name}.partial.jsonl")
+    
+    def _remove_partial_results(self, base_name: str):
+        """文件全部识别完成后删除其片段结果日志"""
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self._partial_results_path(base_name))
     
     def save_result_text(self, full_text: str, filename: str) -> str:
         """
@@ -333,183 +757,174 @@ class AudioProcessor:
         Returns:
             保存的输出文件路径
         """
-        base_name = os.path.splitext(filename)[0]
-        # 获取子文件夹路径
-        output_subfolder = self.get_output_subfolder(base_name)
-        output_file = os.path.join(output_subfolder, f"{base_name}.txt")
+        output_file = self._result_text_path(os.path.splitext(filename)[0])
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(full_text)
+        write_text_atomic(output_file, full_text)
+        self._record_output(output_file)
         
         return output_file
 
-    def process_single_file(self, input_path: str) -> bool:
+    def process_single_file(self, input_path: str, base_name: Optional[str] = None) -> bool:
         """
         处理单个音频文件
         
         Args:
             input_path: 音频文件路径
+            base_name: 不含扩展名的文件名，未提供时由input_path计算
             
         Returns:
             处理是否成功
         """
         filename = os.path.basename(input_path)
+        if base_name is None:
+            base_name = os.path.splitext(filename)[0]
         
-        try:
-            # 创建单个文件总进度条
-            file_progress = self.create_progress_bar(
-                "file_progress",
-                total=4,  # 分割、识别、重试、保存 4个阶段
-                prefix=f"处理 {filename}",
-                suffix="准备中"
+        # 创建单个文件总进度条
+        file_progress = self.create_progress_bar(
+            "file_progress",
+            total=4,  # 分割、识别、重试、保存 4个阶段
+            prefix=f"处理 {filename}",
+            suffix="准备中"
+        )
+        
+        # 记录单个文件处理开始时间
+        file_start_time = time.time()
+        
+        # 音频总时长用于计算各部分时间戳，需在分割前获取以便分割复用解码结果
+        total_duration = self.get_audio_duration(input_path)
+        
+        # 分割音频为较小片段
+        self.update_progress("file_progress", 0, "分割音频")
+        segment_files = self.split_audio_file(input_path)
+        
+        if not segment_files:
+            logging.error(f"分割 {filename} 失败，跳过此文件")
+            self.finish_progress("file_progress", "分割失败，跳过")
+            return False
+        
+        # 计算音频总时长和预计部分数
+        total_segments = len(segment_files)
+        total_parts = (total_segments + self.segments_per_part - 1) // self.segments_per_part
+        
+        logging.info(f"音频 {filename} 共有 {total_segments} 个片段，将分为 {total_parts} 个部分处理")
+        
+        # 处理记录及其部分列表只取一次，循环内原地追加，续处理时保留之前部分的统计
+        record = self.processed_files.setdefault(input_path, {})
+        processed_parts = record.setdefault("processed_parts", [])
+        part_stats = record.setdefault("part_stats", [])
+        
+        # 按部分处理音频片段，每部分的识别结果生成文本后即释放，不在整个文件范围内累积
+        for part_index in range(total_parts):
+            part_num = part_index + 1
+            
+            # 检查此部分是否已处理
+            if part_num in processed_parts:
+                logging.info(f"跳过已处理的部分 {part_num}/{total_parts}")
+                continue
+            
+            # 计算此部分的片段范围
+            start_segment = part_index * self.segments_per_part
+            end_segment = min(start_segment + self.segments_per_part, total_segments)
+            current_part_segments = segment_files[start_segment:end_segment]
+            
+            logging.info(f"处理部分 {part_num}/{total_parts} (片段 {start_segment+1}-{end_segment})")
+            
+            # 调用转录管理器的transcribe_segments方法处理当前部分的片段，结果以部分内的相对索引为键；
+            # 识别成功的片段按全局索引写入片段结果日志，之前中断时已识别的片段不再请求ASR
+            segment_results, stats = self.transcription_manager.transcribe_segments(
+                current_part_segments,
+                partial_file=self._partial_results_path(base_name),
+                index_offset=start_segment
             )
             
-            # 记录单个文件处理开始时间
-            file_start_time = time.time()
+            # 检查中断状态，只会置为True，不覆盖其他线程记录的中断
+            part_interrupted = self.transcription_manager.interrupt_received
+            if part_interrupted:
+                self.interrupt_received = True
+            
+            # 准备当前部分的结果文本
+            self.update_progress("file_progress", 3, f"生成部分 {part_num} 文本")
+            
+            # 准备当前部分的文本，传入start_segment确保时间戳连续
+            part_text = self.prepare_result_text(current_part_segments, segment_results, start_segment)
+            del segment_results
+            # 当处理部分时计算时间戳
+            start_time = start_segment * 30  # 假设每个片段30秒
+            end_time = min(end_segment * 30, total_duration)  # 使用实际音频总时长来限制
+            
+            # 保存当前部分的结果
+            part_output_file = self.save_part_result(
+                                    part_text, 
+                                    filename, 
+                                    part_num,
+                                    total_parts=total_parts,
+                                    start_time=start_time,
+                                    end_time=end_time,
+                                    base_name=base_name
+                                )
+            # 识别中途被中断的部分仍保存已有文本，但不记为已处理：再次处理时重新处理该部分，
+            # 已识别的片段从片段结果日志读取，只有缺失的片段会再次请求ASR
+            if part_interrupted:
+                logging.warning(f"部分 {part_num}/{total_parts} 识别被中断，已保存部分结果，下次处理时补全")
+                break
+            
+            # 记录当前部分的统计信息，统计与处理记录共用同一时间字符串
+            processed_time = now_str()
+            part_stats.append({
+                "part": part_num,
+                "segments": end_segment - start_segment,
+                "success_count": stats['success_count'],
+                "output_file": part_output_file,
+                "processed_time": processed_time
+            })
             
-            # 检查文件是否已在记录中及其处理状态
-            file_record = self.processed_files.get(input_path, {})
-            processed_parts = file_record.get("processed_parts", [])
-            
-            # 分割音频为较小片段
-            self.update_progress("file_progress", 0, "分割音频")
-            segment_files = self.split_audio_file(input_path)
-            
-            if not segment_files:
-                logging.error(f"分割 {filename} 失败，跳过此文件")
-                self.finish_progress("file_progress", "分割失败，跳过")
-                return False
-            
-            # 计算音频总时长和预计部分数
-            total_segments = len(segment_files)
-            total_parts = (total_segments + self.segments_per_part - 1) // self.segments_per_part
+            # 更新处理记录
+            processed_parts.append(part_num)
+            record["total_parts"] = total_parts
+            record["last_processed_time"] = processed_time
             
-            logging.info(f"音频 {filename} 共有 {total_segments} 个片段，将分为 {total_parts} 个部分处理")
+            # 保存记录；最后一部分或中断时由下方的最终状态一并保存
+            if part_num < total_parts and not self.interrupt_received:
+                self._save_processed_records(input_path)
             
-            # 按部分处理音频片段
-            all_segment_results = {}
-            part_stats = []
+            logging.info(f"✅ 部分 {part_num}/{total_parts} 已处理并保存")
             
-            for part_index in range(total_parts):
-                part_num = part_index + 1
-                
-                # 检查此部分是否已处理
-                if part_num in processed_parts:
-                    logging.info(f"跳过已处理的部分 {part_num}/{total_parts}")
-                    continue
-                
-                # 计算此部分的片段范围
-                start_segment = part_index * self.segments_per_part
-                end_segment = min(start_segment + self.segments_per_part, total_segments)
-                current_part_segments = segment_files[start_segment:end_segment]
-                
-                logging.info(f"处理部分 {part_num}/{total_parts} (片段 {start_segment+1}-{end_segment})")
-                
-                
-                # 调用转录管理器的transcribe_segments方法处理当前部分的片段
-                segment_indices = list(range(start_segment, end_segment))
-                current_part_files = current_part_segments
-                segment_results, stats = self.transcription_manager.transcribe_segments(current_part_files)
-                
-                # 将相对索引转换为全局索引
-                adjusted_results = {}
-                for rel_idx, text in segment_results.items():
-                    abs_idx = start_segment + rel_idx
-                    adjusted_results[abs_idx] = text
-                
-                # 合并结果
-                all_segment_results.update(adjusted_results)
-                
-                # 检查中断状态
-                self.interrupt_received = self.transcription_manager.interrupt_received
-                
-                # 准备当前部分的结果文本
-                self.update_progress("file_progress", 3, f"生成部分 {part_num} 文本")
-                
-                # 获取当前部分的片段文件列表和结果
-                current_part_results = {i-start_segment: all_segment_results.get(i) 
-                                     for i in range(start_segment, end_segment)
-                                     if i in all_segment_results}
-                
-                # 准备当前部分的文本，传入start_segment确保时间戳连续
-                part_text = self.prepare_result_text(current_part_files, current_part_results, start_segment)
-                # 当处理部分时计算时间戳
-                total_duration = self.get_audio_duration(input_path)
-                start_time = start_segment * 30  # 假设每个片段30秒
-                end_time = min(end_segment * 30, total_duration)  # 使用实际音频总时长来限制
+            # 如果收到中断信号，停止处理
+            if self.interrupt_received:
+                logging.warning(f"检测到中断信号，暂停处理文件 {filename}")
+                break
+        
+        # 计算文件总处理时长
+        file_duration = time.time() - file_start_time
+        formatted_duration = format_time_duration(file_duration)
+        
+        # 检查是否所有部分都已处理完
+        processed_parts_count = len(processed_parts)
+        all_parts_processed = processed_parts_count >= total_parts
+        
+        # 更新文件处理状态
+        record.update(
+            completed=all_parts_processed,
+            interrupted=self.interrupt_received,
+            duration=formatted_duration
+        )
+        self._save_processed_records(input_path)
+        if all_parts_processed:
+            self._remove_partial_results(base_name)
+        
+        # 完成文件处理进度条
+        status = "完成" if all_parts_processed else "部分完成"
+        self.finish_progress("file_progress", 
+                           f"{status} - 处理了 {processed_parts_count}/{total_parts} 部分, 耗时: {formatted_duration}")
+        
+        logging.info(f"✅ {filename} 转换{'' if all_parts_processed else '部分'}完成: " + 
+                   f"处理了 {processed_parts_count}/{total_parts} 部分" +
+                   f" - 耗时: {formatted_duration}")
+        
+        return True
 
-                # 保存当前部分的结果
-                part_output_file = self.save_part_result(
-                                        part_text, 
-                                        filename, 
-                                        part_num,
-                                        total_parts=total_parts,
-                                        start_time=start_time,
-                                        end_time=end_time
-                                    )
-                # 记录当前部分的统计信息
-                part_stats.append({
-                    "part": part_num,
-                    "segments": end_segment - start_segment,
-                    "success_count": stats['success_count'],
-                    "output_file": part_output_file,
-                    "processed_time": time.strftime("%Y-%m-%d %H:%M:%S")
-                })
-                
-                # 更新处理记录
-                if input_path not in self.processed_files:
-                    self.processed_files[input_path] = {}
-                
-                if "processed_parts" not in self.processed_files[input_path]:
-                    self.processed_files[input_path]["processed_parts"] = []
-                
-                self.processed_files[input_path]["processed_parts"].append(part_num)
-                self.processed_files[input_path]["total_parts"] = total_parts
-                self.processed_files[input_path]["last_processed_time"] = time.strftime("%Y-%m-%d %H:%M:%S")
-                self.processed_files[input_path]["part_stats"] = part_stats
-                
-                # 保存记录
-                self._save_processed_records()
-                
-                logging.info(f"✅ 部分 {part_num}/{total_parts} 已处理并保存")
-                
-                # 如果收到中断信号，停止处理
-                if self.interrupt_received:
-                    logging.warning(f"检测到中断信号，暂停处理文件 {filename}")
-                    break
-            
-            # 计算文件总处理时长
-            file_duration = time.time() - file_start_time
-            formatted_duration = format_time_duration(file_duration)
-            
-            # 检查是否所有部分都已处理完
-            all_parts_processed = len(self.processed_files[input_path]["processed_parts"]) >= total_parts
-            
-            # 更新文件处理状态
-            self.processed_files[input_path]["completed"] = all_parts_processed
-            self.processed_files[input_path]["interrupted"] = self.interrupt_received
-            self.processed_files[input_path]["duration"] = formatted_duration
-            self._save_processed_records()
-            
-            # 完成文件处理进度条
-            status = "完成" if all_parts_processed else "部分完成"
-            processed_parts_count = len(self.processed_files[input_path]["processed_parts"])
-            self.finish_progress("file_progress", 
-                               f"{status} - 处理了 {processed_parts_count}/{total_parts} 部分, 耗时: {formatted_duration}")
-            
-            logging.info(f"✅ {filename} 转换{'' if all_parts_processed else '部分'}完成: " + 
-                       f"处理了 {processed_parts_count}/{total_parts} 部分" +
-                       f" - 耗时: {formatted_duration}")
-            
-            return True
-            
-        except Exception as e:
-            logging.error(f"❌ {filename} 处理失败: {str(e)}")
-            # 确保进度条完成
-            self.finish_progress("file_progress", f"处理失败: {str(e)}")
-            return False
-    
-    def save_part_result(self, text: str, original_filename: str, part_num: int, total_parts: int = None, start_time: float = None, end_time: float = None) -> str:
+    def save_part_result(self, text: str, original_filename: str, part_num: int, total_parts: int = None, start_time: float = None, end_time: float = None,
+                         base_name: Optional[str] = None) -> str:
         """
         保存部分转写结果到文本文件
         
@@ -520,64 +935,67 @@ class AudioProcessor:
             total_parts: 总部分数
             start_time: 该部分的开始时间(秒)
             end_time: 该部分的结束时间(秒)
+            base_name: 不含扩展名的文件名，未提供时由original_filename计算
                 
         Returns:
             保存的输出文件路径
         """
-        base_name = os.path.splitext(original_filename)[0]
-        output_file = os.path.join(self.output_folder, f"{base_name}_part{part_num}.txt")
+        if base_name is None:
+            base_name = os.path.splitext(original_filename)[0]
+        output_file = os.path.join(self.get_output_subfolder(base_name), f"{base_name}_part{part_num}.txt")
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            # 添加文件头，包含部分信息和详细时间戳
-            f.write(f"### {base_name} - Part {part_num}")
-            if total_parts:
-                f.write(f"/{total_parts}")
-            
-            # 添加时间戳信息（如果提供）
-            if start_time is not None and end_time is not None:
-                start_formatted = time.strftime("%H:%M:%S", time.gmtime(start_time))
-                end_formatted = time.strftime("%H:%M:%S", time.gmtime(end_time))
-                f.write(f" - {start_formatted} 到 {end_formatted}")
-                
-                # 添加更详细的时间连接信息
-                if part_num > 1:
-                    # 前一部分的结束时间点
-                    prev_end_formatted = time.strftime("%H:%M:%S", time.gmtime(start_time))
-                    f.write(f"\n\n> 接上一部分 {part_num-1} 的时间点: {prev_end_formatted}")
-                
-                if part_num < total_parts:
-                    # 下一部分的开始时间点
-                    next_start_formatted = time.strftime("%H:%M:%S", time.gmtime(end_time))
-                    f.write(f"\n\n> 与下一部分 {part_num+1} 的连接时间点: {next_start_formatted}")
-            
-            # 添加详细的时间段说明
-            f.write("\n\n<!-- 本部分包含的时间段: -->")
-            segment_length = 30  # 默认每个片段30秒
-            segments_count = int((end_time - start_time) / segment_length)
-            
-            # 显示部分中的几个关键时间段
-            if segments_count > 0:
-                # 显示第一个时间段
-                first_start = time.strftime("%H:%M:%S", time.gmtime(start_time))
-                first_end = time.strftime("%H:%M:%S", time.gmtime(start_time + segment_length))
-                f.write(f"\n\n<!-- 开始: [{first_start}-{first_end}] -->")
-                
-                # 如果段数很多，显示中间的一个时间段
-                if segments_count > 2:
-                    mid_point = start_time + (segments_count // 2) * segment_length
-                    mid_start = time.strftime("%H:%M:%S", time.gmtime(mid_point))
-                    mid_end = time.strftime("%H:%M:%S", time.gmtime(mid_point + segment_length))
-                    f.write(f"\n\n<!-- 中间: [{mid_start}-{mid_end}] -->")
-                
-                # 显示最后一个时间段
-                last_start_time = end_time - segment_length
-                if last_start_time > start_time:  # 确保至少有两个段
-                    last_start = time.strftime("%H:%M:%S", time.gmtime(last_start_time))
-                    last_end = time.strftime("%H:%M:%S", time.gmtime(end_time))
-                    f.write(f"\n\n<!-- 结束: [{last_start}-{last_end}] -->")
-            
-            f.write("\n\n")
-            f.write(text)
+        # 在内存中拼接完整内容，一次原子写入
+        parts = []
+        # 添加文件头，包含部分信息和详细时间戳
+        parts.append(f"### {base_name} - Part {part_num}")
+        if total_parts:
+            parts.append(f"/{total_parts}")
+        
+        # 添加时间戳信息（如果提供）
+        if start_time is not None and end_time is not None:
+            start_formatted = time.strftime("%H:%M:%S", time.gmtime(start_time))
+            end_formatted = time.strftime("%H:%M:%S", time.gmtime(end_time))
+            parts.append(f" - {start_formatted} 到 {end_formatted}")
+            
+            # 添加更详细的时间连接信息
+            if part_num > 1:
+                # 前一部分的结束时间点即本部分开始时间
+                parts.append(f"\n\n> 接上一部分 {part_num-1} 的时间点: {start_formatted}")
+            
+            if part_num < total_parts:
+                # 下一部分的开始时间点即本部分结束时间
+                parts.append(f"\n\n> 与下一部分 {part_num+1} 的连接时间点: {end_formatted}")
+        
+        # 添加详细的时间段说明
+        parts.append("\n\n<!-- 本部分包含的时间段: -->")
+        segment_length = 30  # 默认每个片段30秒
+        segments_count = int((end_time - start_time) / segment_length)
+        
+        # 显示部分中的几个关键时间段
+        if segments_count > 0:
+            # 显示第一个时间段
+            first_start = time.strftime("%H:%M:%S", time.gmtime(start_time))
+            first_end = time.strftime("%H:%M:%S", time.gmtime(start_time + segment_length))
+            parts.append(f"\n\n<!-- 开始: [{first_start}-{first_end}] -->")
+            
+            # 如果段数很多，显示中间的一个时间段
+            if segments_count > 2:
+                mid_point = start_time + (segments_count // 2) * segment_length
+                mid_start = time.strftime("%H:%M:%S", time.gmtime(mid_point))
+                mid_end = time.strftime("%H:%M:%S", time.gmtime(mid_point + segment_length))
+                parts.append(f"\n\n<!-- 中间: [{mid_start}-{mid_end}] -->")
+            
+            # 显示最后一个时间段
+            last_start_time = end_time - segment_length
+            if last_start_time > start_time:  # 确保至少有两个段
+                last_start = time.strftime("%H:%M:%S", time.gmtime(last_start_time))
+                last_end = time.strftime("%H:%M:%S", time.gmtime(end_time))
+                parts.append(f"\n\n<!-- 结束: [{last_start}-{last_end}] -->")
+        
+        parts.append("\n\n")
+        parts.append(text)
+        write_text_atomic(output_file, "".join(parts))
+        self._record_output(output_file)
         
         return output_file
 
@@ -592,34 +1010,41 @@ class AudioProcessor:
         total_start_time = time.time()
         
         try:
-            # 设置信号处理
-            signal.signal(signal.SIGINT, self.handle_interrupt)
-            
-            # 检查网络连接
-            try:
-                logging.info("检查网络连接...")
-                status_code = requests.get("https://www.google.com").status_code
-                logging.info(f"网络连接状态: {status_code}")
-            except Exception as e:
-                logging.warning(f"网络连接检查失败: {str(e)}")
-            
-            # 获取所有媒体文件
-            media_files = []
+            # 每批处理开始时刷新一次输出目录缓存
+            self._refresh_output_entries()
+            
+            # 在后台检查ASR服务的网络连通性，结果只用于日志，完成时记录，主流程不等待
+            probe_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="net_probe")
+            probe_executor.submit(self.asr_manager.check_connectivity).add_done_callback(self._log_connectivity)
+            probe_executor.shutdown(wait=False)
+            
+            # 一次scandir获取所有媒体文件，文件名只拆分一次，得到 (文件名, 主文件名, 小写扩展名)
+            entries = []
+            with os.scandir(self.media_folder) as it:
+                for entry in it:
+                    if entry.is_file():
+                        base, ext = os.path.splitext(entry.name)
+                        entries.append((entry.name, base, ext.lower()))
             
             # 处理MP3文件
-            mp3_files = [f for f in os.listdir(self.media_folder) 
-                        if f.lower().endswith('.mp3')]
-            media_files.extend(mp3_files)
+            media_files = [name for name, _, ext in entries if ext == '.mp3']
             
             # 如果开启视频处理，获取视频文件
             if self.process_video:
-                video_files = [f for f in os.listdir(self.media_folder) 
-                            if any(f.lower().endswith(ext) for ext in self.video_extensions)]
                 # 从json文件中读取数据，如果存在对应的mp3文件，则不再处理
-                processed_files_names = [os.path.basename(f) for f in self.processed_files.keys()]
-                video_files = [f for f in video_files if f.replace(".mp4", ".mp3") not in processed_files_names
-                               and f.replace(".mov", ".mp3") not in processed_files_names]
+                self._flush_processed_records()
+                processed_files_names = self._processed_basenames
+                # 主文件名已在scandir时拆出，直接拼接对应的mp3文件名，适用于所有视频格式
+                video_files = [name for name, base, ext in entries
+                               if ext in self.video_extensions
+                               and f"{base}.mp3" not in processed_files_names]
                 media_files.extend(video_files)
+                
+                # 视频音频提取提前在提取线程池中进行，与转录重叠；
+                # 有处理记录的视频已在上面过滤掉，剩下的都需要提取
+                with self._prefetch_lock:
+                    self._prefetch_queue.extend(video_files)
+                self._prefetch_extractions()
             
             if not media_files:
                 logging.warning(f"在 {self.media_folder} 中没有找到可处理的媒体文件")
@@ -628,17 +1053,21 @@ class AudioProcessor:
             # 显示要处理的文件
             logging.info(f"找到 {len(media_files)} 个媒体文件需要处理")
             
-            # 使用线程池并行处理文件
-            with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # 使用线程池并行处理文件，处理期间安装中断信号处理
+            executor = self._get_file_pool()
+            with self._sigint_guard():
+                futures = {executor.submit(self.process_file, filename): filename for filename in media_files}
+                # 按完成顺序收集结果，进度反映实际完成的文件数，单个文件出错不影响其他文件
+                completed = concurrent.futures.as_completed(futures)
                 # 是否使用进度条
                 if self.show_progress:
-                    list(tqdm(
-                        executor.map(self.process_file, media_files),
-                        total=len(media_files),
-                        desc="处理媒体文件"
-                    ))
-                else:
-                    list(executor.map(self.process_file, media_files))
+                    from tqdm import tqdm  # 仅显示进度条时才需要，避免拖慢启动
+                    completed = tqdm(completed, total=len(futures), desc="处理媒体文件")
+                for future in completed:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        logging.error(f"处理文件 {futures[future]} 时出错: {str(e)}")
             
             processed_files_count = len(media_files)
             
@@ -651,12 +1080,53 @@ class AudioProcessor:
             return processed_files_count, total_duration
             
         finally:
-            # 恢复原始信号处理程序
-            signal.signal(signal.SIGINT, self.original_sigint_handler)
-            
             # 清理临时文件
             self.cleanup()
     
+    def _get_split_pool(self) -> concurrent.futures.ProcessPoolExecutor:
+        """
+        获取pydub分割使用的进程池，不存在(首次调用或已在cleanup中关闭)时创建
+        
+        Returns:
+            分割音频的进程池
+        """
+        with self._split_pool_lock:
+            if self._split_pool is None:
+                self._split_pool = concurrent.futures.ProcessPoolExecutor(max_workers=self._split_processes)
+            return self._split_pool
+    
+    def _get_file_pool(self) -> concurrent.futures.ThreadPoolExecutor:
+        """
+        获取文件级线程池，不存在(首次调用或已在cleanup中关闭)时创建
+        
+        Returns:
+            处理媒体文件的线程池
+        """
+        with self._file_pool_lock:
+            if self._file_pool is None:
+                self._file_pool = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="media_file")
+            return self._file_pool
+    
+    def _log_connectivity(self, connectivity: concurrent.futures.Future):
+        """
+        记录后台网络连通性检查的结果，作为任务完成回调调用
+        
+        Args:
+            connectivity: 已完成的check_connectivity任务
+        """
+        try:
+            results = connectivity.result()
+        except Exception as e:
+            logging.warning(f"网络连接检查失败: {str(e)}")
+            return
+        
+        unreachable = [name for name, ok in results.items() if not ok]
+        if unreachable:
+            logging.warning(f"以下ASR服务无法连接: {', '.join(unreachable)}")
+        else:
+            logging.info("ASR服务网络连接正常")
+    
     def extract_audio_from_video(self, video_path):
         """
         从视频文件中提取音频
@@ -669,19 +1139,20 @@ class AudioProcessor:
         """
         video_filename = os.path.basename(video_path)
         base_name = os.path.splitext(video_filename)[0]
-        audio_path = os.path.join(self.output_folder, f"{base_name}.mp3")
+        audio_filename = f"{base_name}.mp3"
+        audio_path = os.path.join(self.output_folder, audio_filename)
         
         # 检查音频文件是否已经存在且在处理记录中
-        if os.path.exists(audio_path):
+        if audio_filename in self._output_entries:
+            record = self.processed_files.get(audio_path)
             # 检查是否在已处理记录中
-            if audio_path in self.processed_files:
-                # 如果不是中断状态，则直接返回现有音频路径
-                if not self.processed_files[audio_path].get('interrupted', False):
-                    logging.info(f"音频已存在且已处理: {audio_path}")
-                    return audio_path, False
-            else:
+            if record is None:
                 logging.info(f"音频已存在但未记录处理: {audio_path}")
                 return audio_path, False
+            # 如果不是中断状态，则直接返回现有音频路径
+            if not record.get('interrupted', False):
+                logging.info(f"音频已存在且已处理: {audio_path}")
+                return audio_path, False
         
         # 创建进度条
         progress_name = f"extract_{video_filename}"
@@ -692,20 +1163,87 @@ class AudioProcessor:
             suffix="准备中"
         )
         
-        # 定义进度回调函数
+        # 定义进度回调函数，限制刷新频率为每0.1秒一次，避免频繁输出
+        last_update = [0.0]
+        
         def progress_callback(current: int, total: int, message: str):
-            self.update_progress(progress_name, current, message)
-            
             # 如果是结束消息，完成进度条
             if current >= total:
                 self.finish_progress(progress_name, message)
+                return
+            
+            now = time.monotonic()
+            if now - last_update[0] > 0.1:
+                last_update[0] = now
+                self.update_progress(progress_name, current, message)
         
         # 使用音频分割器提取音频
-        return self.audio_splitter.extract_audio_from_video(
+        audio_path, is_new = self.audio_splitter.extract_audio_from_video(
             video_path, 
             self.output_folder, 
-            progress_callback
+            self._queued_progress(progress_callback)
         )
+        if is_new:
+            self._output_entries.add(audio_filename)
+        return audio_path, is_new
+    
+    def _prepare_video_audio(self, video_path: str) -> Tuple[Optional[str], bool]:
+        """
+        准备视频的音频供转录使用
+        
+        只需转录时，直接从视频提取并分割为片段，只解码一次且不生成完整音频文件；
+        只提取音频、输出目录已有提取好的音频或直接分割失败时，先提取音频再分割
+        
+        Args:
+            video_path: 视频文件路径
+            
+        Returns:
+            tuple: (音频记录路径, 是否是新提取的), 失败则返回(None, False)
+        """
+        audio_filename = f"{os.path.splitext(os.path.basename(video_path))[0]}.mp3"
+        if self.extract_audio_only or not self.fuse_video_split or audio_filename in self._output_entries:
+            return self.extract_audio_from_video(video_path)
+        
+        try:
+            segment_files, duration = self.audio_splitter.extract_and_split(video_path)
+        except (OSError, subprocess.CalledProcessError) as e:
+            logging.warning(f"直接提取并分割音频失败，改为先提取音频: {str(e)}")
+            return self.extract_audio_from_video(video_path)
+        
+        if not segment_files:
+            logging.warning(f"未能从视频分割出音频片段，改为先提取音频: {video_path}")
+            return self.extract_audio_from_video(video_path)
+        
+        # 处理记录仍以输出目录中的mp3路径为键，与先提取再分割时保持一致
+        audio_path = os.path.join(self.output_folder, audio_filename)
+        self._presplit_segments[audio_path] = self._track_segment_dir(audio_path, segment_files)
+        if duration > 0:
+            self._audio_durations[audio_path] = duration
+        return audio_path, True
+    
+    def _presplit_audio(self, audio_path: str):
+        """
+        使用FFmpeg把音频直接切分为片段，并记录同一次运行得到的时长
+        
+        已有预分割结果(视频直接提取分割)或未启用FFmpeg分割时不做处理；
+        失败时交回常规流程，由get_audio_duration和split_audio_file处理
+        
+        Args:
+            audio_path: 音频文件路径
+        """
+        if audio_path in self._presplit_segments or not self.audio_splitter.use_ffmpeg_segment:
+            return
+        
+        try:
+            segment_files, duration = self.audio_splitter.extract_and_split(audio_path)
+        except (OSError, subprocess.CalledProcessError) as e:
+            logging.warning(f"FFmpeg直接分割失败，改用常规流程: {str(e)}")
+            return
+        
+        if segment_files:
+            self._presplit_segments[audio_path] = self._track_segment_dir(audio_path, segment_files)
+            if duration > 0:
+                self._audio_durations[audio_path] = duration
     
     def process_file(self, filename):
         """
@@ -714,31 +1252,42 @@ class AudioProcessor:
         Args:
             filename: 媒体文件名
         """
-
         file_path = os.path.join(self.media_folder, filename)
-        file_extension = os.path.splitext(filename)[1].lower()
+        base_name, file_extension = os.path.splitext(filename)
+        
+        # 按扩展名分派到对应的处理方法
+        handler = self._handlers.get(file_extension.lower())
+        if handler:
+            handler(file_path, filename, base_name)
+        else:
+            logging.warning(f"不支持的文件类型: {filename}")
+    
+    def _handle_video(self, file_path: str, filename: str, base_name: str):
+        """
+        处理视频文件 - 需要先提取音频
+        
+        Args:
+            file_path: 视频文件路径
+            filename: 视频文件名
+            base_name: 不含扩展名的文件名
+        """
+        logging.info(f"处理视频文件: {filename}")
+        
+        # 检查对应的mp3文件是否已在处理记录中且已完成
+        mp3_path = os.path.join(self.output_folder, f"{base_name}.mp3")
         
-        # 处理视频文件 - 需要先提取音频
-        if file_extension in self.video_extensions:
-            logging.info(f"处理视频文件: {filename}")
+        # 修改完成检查逻辑 - 检查是否所有部分都已处理
+        if self._is_completed(mp3_path):
+            logging.info(f"跳过已处理完成的视频: {filename}")
+            return
             
-            # 检查对应的mp3文件是否已在处理记录中且已完成
-            base_name = os.path.splitext(filename)[0]
-            mp3_path = os.path.join(self.output_folder, f"{base_name}.mp3")
-            
-            # 修改完成检查逻辑 - 检查是否所有部分都已处理
-            is_completed = False
-            if mp3_path in self.processed_files:
-                record = self.processed_files[mp3_path]
-                if record.get("completed", False):
-                    is_completed = True
-                    
-            if is_completed:
-                logging.info(f"跳过已处理完成的视频: {filename}")
-                return
-                
-            # 提取音频
-            audio_path, is_new = self.extract_audio_from_video(file_path)
+        # 提取音频，优先使用提前提交的提取任务
+        extraction = self._take_extraction(filename)
+        try:
+            if extraction is not None:
+                audio_path, is_new = extraction.result()
+            else:
+                audio_path, is_new = self._prepare_video_audio(file_path)
             
             # 如果只需要提取音频，到此为止
             if self.extract_audio_only:
@@ -750,45 +1299,49 @@ class AudioProcessor:
                 
             # 继续处理提取出的音频文件
             if audio_path:
-                self.transcribe_audio(audio_path, filename)
+                self.transcribe_audio(audio_path, filename, base_name)
             else:
                 logging.error(f"从视频提取音频失败: {filename}")
+        finally:
+            # 释放提前提取占用的槽位，并继续提交后续视频的提取任务
+            if extraction is not None:
+                self._extract_slots.release()
+            self._prefetch_extractions()
+    
+    def _handle_audio(self, file_path: str, filename: str, base_name: str):
+        """
+        处理音频文件
         
-        # 处理音频文件
-        elif file_extension == '.mp3':
-            # 检查是否已完全处理完成
-            is_completed = False
-            if file_path in self.processed_files:
-                record = self.processed_files[file_path]
-                if record.get("completed", False):
-                    is_completed = True
-                
-            if is_completed:
-                logging.info(f"跳过已处理完成的音频: {filename}")
-                return
-                
-            logging.info(f"处理音频文件: {filename}")
-            self.transcribe_audio(file_path, filename)
-        
-        else:
-            logging.warning(f"不支持的文件类型: {filename}")
+        Args:
+            file_path: 音频文件路径
+            filename: 音频文件名
+            base_name: 不含扩展名的文件名
+        """
+        # 检查是否已完全处理完成
+        if self._is_completed(file_path):
+            logging.info(f"跳过已处理完成的音频: {filename}")
+            return
+            
+        logging.info(f"处理音频文件: {filename}")
+        self.transcribe_audio(file_path, filename, base_name)
     
-    def transcribe_audio(self, audio_path, original_filename):
+    def transcribe_audio(self, audio_path, original_filename, base_name: Optional[str] = None):
         """
         将音频转录为文本
         
         Args:
             audio_path: 音频文件路径
             original_filename: 原始文件名
+            base_name: 不含扩展名的文件名，由调用方传入时不再重复拆分
         """
-        # 生成输出文本文件路径
-        base_name = os.path.splitext(original_filename)[0]
-        output_path = os.path.join(self.output_folder, f"{base_name}.txt")
+        # 生成输出文本文件路径，文件名只拆分一次并传给后续各步骤
+        if base_name is None:
+            base_name = os.path.splitext(original_filename)[0]
+        output_filename = f"{base_name}.txt"
+        output_path = os.path.join(self.output_folder, output_filename)
         
         # 如果输出文件已存在且文件已经处理过且不是中断状态，则跳过
-        if (os.path.exists(output_path) and 
-            audio_path in self.processed_files and 
-            not self.processed_files[audio_path].get('interrupted', False)):
+        if output_filename in self._output_entries and self._is_processed(audio_path):
             logging.info(f"跳过已处理的文件: {original_filename}")
             return
             
@@ -796,6 +1349,9 @@ class AudioProcessor:
             # 记录开始处理
             logging.info(f"开始转录音频: {original_filename}")
             
+            # 先用FFmpeg直接分割，同时得到音频时长，无需为获取时长解码整个文件
+            self._presplit_audio(audio_path)
+            
             # 获取音频时长，决定是否分part处理
             audio_duration = self.get_audio_duration(audio_path)
             use_part_processing = audio_duration > self.part_processing_threshold
@@ -803,39 +1359,49 @@ class AudioProcessor:
             if use_part_processing:
                 logging.info(f"音频 {original_filename} 长度为 {audio_duration:.2f} 秒，超过 {self.part_processing_threshold} 秒阈值，将按分part处理")
                 # 分part处理，使用原有逻辑
-                success = self.process_single_file(audio_path)
+                success = self.process_single_file(audio_path, base_name)
             else:
                 logging.info(f"音频 {original_filename} 长度为 {audio_duration:.2f} 秒，不超过 {self.part_processing_threshold} 秒阈值，将作为整体处理")
                 # 不分part处理，调用新的整体处理方法
-                success = self.process_single_file_no_parts(audio_path)
+                success = self.process_single_file_no_parts(audio_path, base_name)
             
             # 打印处理结果
             if success:
                 logging.info(f"转录完成: {output_path}")
                 
                 # 如果是从视频提取的音频，删除音频文件以节省空间
-                video_extensions = [ext for ext in self.video_extensions if original_filename.lower().endswith(ext)]
-                if video_extensions and os.path.exists(audio_path):
+                is_from_video = original_filename[len(base_name):].lower() in self.video_extensions
+                if is_from_video and os.path.exists(audio_path):
                     logging.info(f"删除提取的音频文件: {audio_path}")
-                    os.remove(audio_path)  # 删除已处理的音频文件
+                    self._schedule_delete(audio_path)  # 后台删除已处理的音频文件
+                    self._output_entries.discard(os.path.basename(audio_path))
             else:
                 logging.warning(f"转录失败: {original_filename}")
                 
         except Exception as e:
-            # 处理异常
-            logging.error(f"转录音频时发生错误: {original_filename} - {str(e)}")
-            
-            # 记录失败状态
-            self.processed_files[audio_path] = {
-                "processed_time": time.strftime("%Y-%m-%d %H:%M:%S"),
-                "status": "failed",
-                "error": str(e)
-            }
-            self._save_processed_records()
+            # 处理异常，分part与整体处理的失败都在此统一记录
+            logging.error(f"❌ 转录音频时发生错误: {original_filename} - {str(e)}")
+            self.finish_progress("file_progress", f"处理失败: {str(e)}")
+            
+            # 记录失败状态，保留已完成部分的记录以便下次续传
+            self.processed_files.setdefault(audio_path, {}).update(
+                processed_time=now_str(),
+                status="failed",
+                error=str(e)
+            )
+            self._mark_dirty(audio_path)
             
             # 如果是中断信号
             if self.interrupt_received:
                 logging.warning(f"转录被用户中断: {original_filename}")
+        finally:
+            # 释放未被分割使用的解码音频和预分割片段列表
+            self._decoded_audio.pop(audio_path, None)
+            self._presplit_segments.pop(audio_path, None)
+            # 该文件的片段已用完，后台删除本次分割的片段子目录，不必等到最后统一清理
+            segment_subdir = self._segment_dirs.pop(audio_path, None)
+            if segment_subdir:
+                self._cleanup_executor.submit(fast_rmtree, os.path.join(self.temp_segments_dir, segment_subdir))
     
     def print_statistics(self, processed_files_count: int, total_duration: float):
         """打印处理统计信息"""
@@ -861,10 +1427,40 @@ class AudioProcessor:
         """清理临时文件和资源"""
         logging.info("开始清理临时文件和资源...")
         
+        # 取消尚未开始的音频提取任务
+        self._cancel_pending_extractions()
+        
+        # 关闭文件级线程池，再次处理时重新创建
+        with self._file_pool_lock:
+            file_pool, self._file_pool = self._file_pool, None
+        if file_pool is not None:
+            file_pool.shutdown(wait=False, cancel_futures=True)
+        
+        # 关闭分割进程池，再次处理时重新创建
+        with self._split_pool_lock:
+            split_pool, self._split_pool = self._split_pool, None
+        if split_pool is not None:
+            split_pool.shutdown(wait=False, cancel_futures=True)
+        
+        # 写入尚未保存的处理记录，并合并到JSON快照
+        self._flush_processed_records()
+        self._compact_processed_records()
+        with self._records_lock:
+            record_fp, self._record_fp = self._record_fp, None
+        if record_fp is not None:
+            record_fp.close()
+        
+        # 等待后台删除线程处理完剩余文件
+        self._stop_delete_worker()
+        
         # 关闭ASR管理器资源
         self._close_asr_resources()
         
-        # 关闭所有未完成的进度条
+        # 关闭识别结果缓存文件
+        self.transcription_manager.close()
+        
+        # 渲染完队列中剩余的进度，再关闭所有未完成的进度条
+        self._stop_progress_drain()
         self._close_progress_bars()
         
         # 清理临时目录
@@ -876,14 +1472,25 @@ class AudioProcessor:
         # 最终的结束日志
         logging.info("=== 程序执行结束 ===")
 
+    def _cancel_pending_extractions(self):
+        """取消尚未开始的音频提取任务并归还槽位"""
+        with self._prefetch_lock:
+            self._prefetch_queue.clear()
+            for future in self._pending_extractions.values():
+                future.cancel()
+                self._extract_slots.release()
+            self._pending_extractions.clear()
+    
     def _close_asr_resources(self):
         """关闭ASR管理器资源"""
         if hasattr(self, 'asr_manager'):
             logging.info("关闭ASR管理器资源...")
             try:
-                # 如果ASR管理器有close方法则调用，否则跳过
-                if hasattr(self.asr_manager, 'close') and callable(getattr(self.asr_manager, 'close')):
-                    self.asr_manager.close()
+                # 如果ASR管理器有close方法则调用，否则跳过；只查找一次属性，
+                # 不用except AttributeError包住调用，以免吞掉close内部的异常
+                close = getattr(self.asr_manager, 'close', None)
+                if close is not None:
+                    close()
                 logging.info("ASR管理器资源已关闭")
             except Exception as e:
                 logging.warning(f"关闭ASR管理器资源时出错: {str(e)}")
@@ -899,36 +1506,55 @@ class AudioProcessor:
             logging.info(f"开始清理临时目录: {self.temp_dir}")
             
             # 检查目录是否存在
-            if (os.path.exists(self.temp_dir)):
-                # 使用单独的线程进行清理以避免阻塞
-                def remove_temp_dir():
-                    try:
-                        shutil.rmtree(self.temp_dir, ignore_errors=True)
-                    except Exception as e:
-                        logging.warning(f"清理线程中出错: {str(e)}")
-                
-                # 创建清理线程
-                import threading
-                cleanup_thread = threading.Thread(target=remove_temp_dir, daemon=True)
-                cleanup_thread.start()
-                
-                # 等待最多5秒
-                cleanup_thread.join(timeout=5.0)
-                
-                # 检查是否成功删除
-                if not cleanup_thread.is_alive():
-                    if not os.path.exists(self.temp_dir):
-                        logging.info(f"✓ 临时目录已成功删除: {self.temp_dir}")
-                    else:
-                        logging.warning(f"⚠️ 临时目录可能未完全删除: {self.temp_dir}")
-                else:
-                    logging.warning(f"⚠️ 清理临时目录超时，将继续执行（临时文件可能未完全删除）")
-            else:
+            if not os.path.exists(self.temp_dir):
                 logging.info(f"临时目录不存在，无需清理: {self.temp_dir}")
+                return
+            
+            if not self.async_cleanup:
+                fast_rmtree(self.temp_dir)
+                logging.info(f"✓ 临时目录已删除: {self.temp_dir}")
+                return
+            
+            # 先将目录原子重命名移出，再交给后台线程删除，清理不再阻塞调用方
+            trash_dir = f"{self.temp_dir}.trash.{os.getpid()}.{time.time_ns()}"
+            try:
+                os.rename(self.temp_dir, trash_dir)
+            except OSError as e:
+                logging.warning(f"重命名临时目录失败，改为直接删除: {str(e)}")
+                self._remove_temp_dir_with_timeout()
+                return
+            
+            self._cleanup_executor.submit(fast_rmtree, trash_dir)
+            logging.info(f"✓ 临时目录已移出，后台删除中: {trash_dir}")
                 
         except Exception as e:
             logging.warning(f"⚠️ 清理临时文件失败: {str(e)}")
     
+    def _remove_temp_dir_with_timeout(self, timeout: float = 5.0):
+        """
+        在后台清理线程中删除临时目录，最多等待timeout秒
+        
+        Args:
+            timeout: 最长等待时间(秒)
+        """
+        # 交给共享的后台清理线程删除，不再为每次清理单独创建线程
+        future = self._cleanup_executor.submit(fast_rmtree, self.temp_dir)
+        
+        # 等待最多timeout秒
+        try:
+            future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            logging.warning(f"⚠️ 清理临时目录超时，将继续执行（临时文件可能未完全删除）")
+            return
+        except Exception as e:
+            logging.warning(f"清理线程中出错: {str(e)}")
+        
+        # 检查是否成功删除
+        if not os.path.exists(self.temp_dir):
+            logging.info(f"✓ 临时目录已成功删除: {self.temp_dir}")
+        else:
+            logging.warning(f"⚠️ 临时目录可能未完全删除: {self.temp_dir}")
+    
     def _show_exit_message(self):
         """显示退出消息"""
         # 根据中断状态显示不同消息
@@ -951,96 +1577,125 @@ class AudioProcessor:
         Returns:
             音频时长（秒）
         """
+        if audio_path in self._audio_durations:
+            return self._audio_durations[audio_path]
+        
+        # 优先用ffprobe读取容器信息，不需要解码整个文件
         try:
-            audio = AudioSegment.from_file(audio_path)
-            # pydub以毫秒为单位，转换为秒
-            return len(audio) / 1000.0
+            duration = self.audio_splitter.probe_duration(audio_path)
+            self._audio_durations[audio_path] = duration
+            return duration
+        except (OSError, subprocess.SubprocessError, ValueError) as e:
+            logging.debug(f"ffprobe获取时长失败，改为解码音频: {str(e)}")
+        
+        try:
+            if self._split_processes:
+                # 进程池分割不复用本进程解码的音频，解码也交给子进程，不占用GIL和内存
+                duration = self._get_split_pool().submit(audio_duration_in_process, audio_path).result()
+            else:
+                audio = self.audio_splitter.load_audio(audio_path)
+                # pydub以毫秒为单位，转换为秒
+                duration = len(audio) / 1000.0
+                self._decoded_audio[audio_path] = audio
+            self._audio_durations[audio_path] = duration
+            return duration
         except Exception as e:
             logging.warning(f"获取音频时长失败: {str(e)}，默认按长音频处理")
             return self.part_processing_threshold + 1  # 默认比阈值长，按分part处理
     
     # 添加不分part处理单个文件的方法
-    def process_single_file_no_parts(self, input_path: str) -> bool:
+    def process_single_file_no_parts(self, input_path: str, base_name: Optional[str] = None) -> bool:
         """
         处理单个音频文件(不分part处理)
         
         Args:
             input_path: 音频文件路径
+            base_name: 不含扩展名的文件名，未提供时由input_path计算
             
         Returns:
             处理是否成功
         """
         filename = os.path.basename(input_path)
+        if base_name is None:
+            base_name = os.path.splitext(filename)[0]
         
-        try:
-            # 创建单个文件总进度条
-            file_progress = self.create_progress_bar(
-                "file_progress",
-                total=4,  # 分割、识别、整合、保存 4个阶段
-                prefix=f"处理 {filename}",
-                suffix="准备中"
+        # 创建单个文件总进度条
+        file_progress = self.create_progress_bar(
+            "file_progress",
+            total=4,  # 分割、识别、整合、保存 4个阶段
+            prefix=f"处理 {filename}",
+            suffix="准备中"
+        )
+        
+        # 记录单个文件处理开始时间
+        file_start_time = time.time()
+        
+        # 分割音频为较小片段
+        self.update_progress("file_progress", 0, "分割音频")
+        segment_files = self.split_audio_file(input_path)
+        
+        if not segment_files:
+            logging.error(f"分割 {filename} 失败，跳过此文件")
+            self.finish_progress("file_progress", "分割失败，跳过")
+            return False
+        
+        # 计算音频总时长
+        total_segments = len(segment_files)
+        
+        logging.info(f"音频 {filename} 共有 {total_segments} 个片段，整体处理无需分part")
+        
+        # 使用转录管理器处理音频片段
+        self.update_progress("file_progress", 1, "识别音频")
+        
+        # 转录管理器由并发处理的文件共享，只按处理器的中断状态同步，不清除其他文件收到的中断
+        self.transcription_manager.set_interrupt_flag(self.interrupt_received)
+        
+        # 识别结果按片段顺序边识别边格式化写入输出文件，不在内存中汇总全部文本
+        output_file = self._result_text_path(base_name)
+        with AtomicTextWriter(output_file) as output:
+            writer = OrderedSegmentWriter(
+                output.write,
+                total_segments,
+                format_text=self.format_text,
+                include_timestamps=self.include_timestamps,
+                segment_length=30  # 每个片段30秒
+            )
+            # 中断时已识别的片段保存在片段结果日志中，再次处理时只识别缺失的片段
+            self.transcription_manager.transcribe_segments(
+                segment_files,
+                result_callback=writer.add,
+                partial_file=self._partial_results_path(base_name)
             )
             
-            # 记录单个文件处理开始时间
-            file_start_time = time.time()
-            
-            # 分割音频为较小片段
-            self.update_progress("file_progress", 0, "分割音频")
-            segment_files = self.split_audio_file(input_path)
-            
-            if not segment_files:
-                logging.error(f"分割 {filename} 失败，跳过此文件")
-                self.finish_progress("file_progress", "分割失败，跳过")
-                return False
-            
-            # 计算音频总时长
-            total_segments = len(segment_files)
-            
-            logging.info(f"音频 {filename} 共有 {total_segments} 个片段，整体处理无需分part")
-            
-            # 使用转录管理器处理音频片段
-            self.update_progress("file_progress", 1, "识别音频")
-            
-            # 设置转录管理器的中断标志为False，以便重新开始
-            self.transcription_manager.set_interrupt_flag(False)
-            
-            # 调用转录管理器的transcribe_segments方法处理所有片段
-            segment_results, stats = self.transcription_manager.transcribe_segments(segment_files)
-            
-            # 检查中断状态
-            self.interrupt_received = self.transcription_manager.interrupt_received
-            
-            # 准备结果文本
-            self.update_progress("file_progress", 2, "生成文本")
-            
-            # 准备文本，start_segment=0表示从头开始
-            full_text = self.prepare_result_text(segment_files, segment_results, 0)
+            # 检查中断状态，只会置为True，不覆盖其他线程记录的中断
+            if self.transcription_manager.interrupt_received:
+                self.interrupt_received = True
             
-            # 保存结果
+            # 写出剩余片段并保存
             self.update_progress("file_progress", 3, "保存文本")
-            output_file = self.save_result_text(full_text, filename)
-            
-            # 更新处理记录
-            if input_path not in self.processed_files:
-                self.processed_files[input_path] = {}
-            
-            self.processed_files[input_path]["completed"] = True
-            self.processed_files[input_path]["interrupted"] = self.interrupt_received
-            self.processed_files[input_path]["last_processed_time"] = time.strftime("%Y-%m-%d %H:%M:%S")
-            
-            # 保存记录
-            self._save_processed_records()
-            
-            # 计算文件总处理时长
-            file_duration = time.time() - file_start_time
-            formatted_duration = format_time_duration(file_duration)
-            
-            # 完成文件处理进度条
-            self.finish_progress("file_progress", f"完成 - 耗时: {formatted_duration}")
-            
-            logging.info(f"✅ {filename} 转换完成 - 耗时: {formatted_duration}")
-            
-            return True
-            
-        except Exception as e:
-            logging.error(f"❌ {filename} 处理失败: {str(e)}")
\ No newline at end of file
+            writer.close()
+        self._record_output(output_file)
+        
+        # 计算文件总处理时长
+        file_duration = time.time() - file_start_time
+        formatted_duration = format_time_duration(file_duration)
+        
+        # 更新处理记录，整体处理只记录完成状态，不维护部分列表
+        self.processed_files.setdefault(input_path, {}).update(
+            completed=True,
+            interrupted=self.interrupt_received,
+            last_processed_time=now_str(),
+            duration=formatted_duration
+        )
+        
+        # 保存记录
+        self._save_processed_records(input_path)
+        if not self.interrupt_received:
+            self._remove_partial_results(base_name)
+        
+        # 完成文件处理进度条
+        self.finish_progress("file_progress", f"完成 - 耗时: {formatted_duration}")
+        
+        logging.info(f"✅ {filename} 转换完成 - 耗时: {formatted_duration}")
+        
+        return True
\ No newline at end of file
@@ -1,36 +1,129 @@
 import os
+import shutil
 import logging
-from typing import List, Optional, Callable
-from pydub import AudioSegment
+import tempfile
+import contextlib
+import subprocess
+from typing import Iterator, List, Optional, Callable, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pydub import AudioSegment
 
 class AudioSplitter:
     """负责将音频文件分割成较小的片段"""
+    
+    # 分割失败时报告的FFmpeg错误输出的最大长度(字节)
+    STDERR_TAIL_BYTES = 64 * 1024
 
-    def __init__(self, temp_segments_dir: str, progress_callback: Optional[Callable] = None):
+    def __init__(self, temp_segments_dir: str, progress_callback: Optional[Callable] = None,
+                 use_ffmpeg_segment: bool = True):
         """
         初始化音频分割器
         
         Args:
             temp_segments_dir: 存储临时片段的目录
             progress_callback: 进度回调函数，接受 (current, total, message) 参数
+            use_ffmpeg_segment: 是否使用FFmpeg segment复用器分割，False时使用pydub逐段导出
         """
         self.temp_segments_dir = temp_segments_dir
         self.progress_callback = progress_callback
+        self.use_ffmpeg_segment = use_ffmpeg_segment
         
         # 确保临时目录存在
         os.makedirs(self.temp_segments_dir, exist_ok=True)
     
-    def split_audio_file(self, input_path: str, segment_length: int = 30) -> List[str]:
+    @contextlib.contextmanager
+    def _segment_subdir(self, input_path: str) -> Iterator[str]:
+        """
+        为一次分割创建独占的片段子目录，分割出错时删除该目录
+        
+        每次分割的片段放在temp_segments_dir下以文件名为前缀的新建子目录中，同名不同扩展名或
+        不同目录的文件、以及并发的多次分割互不覆盖，文件处理完即可整体删除；
+        返回的片段文件名带有该子目录前缀，仍是相对temp_segments_dir的路径
+        
+        Args:
+            input_path: 输入音频或视频文件路径
+            
+        Yields:
+            相对temp_segments_dir的子目录名
+        """
+        stem = os.path.splitext(os.path.basename(input_path))[0]
+        output_dir = tempfile.mkdtemp(prefix=f"{stem}_", dir=self.temp_segments_dir)
+        try:
+            yield os.path.basename(output_dir)
+        except BaseException:
+            shutil.rmtree(output_dir, ignore_errors=True)
+            raise
+    
+    @staticmethod
+    def probe_duration(input_path: str, timeout: float = 10) -> float:
+        """
+        使用ffprobe读取容器信息获取音频时长，不解码音频数据
+        
+        Args:
+            input_path: 输入音频或视频文件路径
+            timeout: ffprobe最长执行时间(秒)
+            
+        Returns:
+            音频时长(秒)
+            
+        Raises:
+            OSError: 未安装ffprobe
+            subprocess.SubprocessError: ffprobe执行失败或超时
+            ValueError: 无法解析时长
+        """
+        output = subprocess.check_output(
+            ['ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+             '-of', 'default=nw=1:nk=1', input_path],
+            stderr=subprocess.DEVNULL, universal_newlines=True, timeout=timeout
+        )
+        return float(output.strip())
+    
+    @staticmethod
+    def load_audio(input_path: str) -> "AudioSegment":
+        """
+        加载音频文件，尝试直接加载，如果失败则使用format参数
+        
+        Args:
+            input_path: 输入音频文件路径
+            
+        Returns:
+            解码后的音频
+        """
+        # pydub导入时会探测ffmpeg路径，只在确实需要解码时才导入
+        from pydub import AudioSegment
+        
+        try:
+            return AudioSegment.from_file(input_path)
+        except Exception as e:
+            logging.warning(f"直接加载音频失败，尝试指定格式: {str(e)}")
+            ext = os.path.splitext(input_path)[1].lower()
+            if ext == '.mp3':
+                return AudioSegment.from_mp3(input_path)
+            # 对于其他格式，尝试使用文件扩展名作为格式
+            format_name = ext[1:] if ext.startswith('.') else ext
+            return AudioSegment.from_file(input_path, format=format_name)
+    
+    def split_audio_file(self, input_path: str, segment_length: int = 30,
+                         progress_callback: Optional[Callable] = None,
+                         audio: Optional["AudioSegment"] = None,
+                         duration: Optional[float] = None) -> List[str]:
         """
         将单个音频文件分割为较小片段
         
         Args:
             input_path: 输入音频文件路径
             segment_length: 每个片段的长度(秒)
+            progress_callback: 特定于此操作的进度回调函数，未提供时使用初始化时的回调
+            audio: 已解码的音频，pydub分割时不再重复解码
+            duration: 已知的音频时长(秒)，用于FFmpeg分割时计算进度
             
         Returns:
             分割后的片段文件列表
         """
+        # 回调按调用传入，避免多线程同时分割时互相覆盖实例属性
+        progress_callback = progress_callback or self.progress_callback
+        
         try:
             filename = os.path.basename(input_path)
             logging.info(f"正在分割 {filename} 为小片段...")
@@ -42,18 +135,155 @@ class AudioSplitter:
                 
             logging.info(f"使用临时目录: {self.temp_segments_dir}")
             
-            # 加载音频文件，尝试直接加载，如果失败则使用format参数
-            try:
-                audio = AudioSegment.from_file(input_path)
-            except Exception as e:
-                logging.warning(f"直接加载音频失败，尝试指定格式: {str(e)}")
-                ext = os.path.splitext(input_path)[1].lower()
-                if ext == '.mp3':
-                    audio = AudioSegment.from_mp3(input_path)
-                else:
-                    # 对于其他格式，尝试使用文件扩展名作为格式
-                    format_name = ext[1:] if ext.startswith('.') else ext
-                    audio = AudioSegment.from_file(input_path, format=format_name)
+            # 优先使用FFmpeg segment复用器一次性切分，失败时回退到pydub
+            if self.use_ffmpeg_segment:
+                if duration is None and audio is not None:
+                    duration = len(audio) / 1000.0
+                try:
+                    return self._split_with_ffmpeg(input_path, segment_length, progress_callback, duration)[0]
+                except (OSError, subprocess.CalledProcessError) as e:
+                    logging.warning(f"FFmpeg分割失败，改用pydub分割: {str(e)}")
+            
+            return self._split_with_pydub(input_path, segment_length, progress_callback, audio)
+            
+        except Exception as e:
+            logging.error(f"分割音频失败: {filename}: {str(e)}")
+            raise
+    
+    def extract_and_split(self, video_path: str, segment_length: int = 30,
+                          progress_callback: Optional[Callable] = None) -> Tuple[List[str], float]:
+        """
+        从视频或音频中提取音轨并直接分割为片段，只解码一次且不生成完整的中间音频文件，
+        音频时长由同一次FFmpeg运行得到
+        
+        Args:
+            video_path: 视频或音频文件路径
+            segment_length: 每个片段的长度(秒)
+            progress_callback: 进度回调函数
+            
+        Returns:
+            (分割后的片段文件列表, 音频时长(秒))
+        """
+        logging.info(f"正在提取并分割音频: {os.path.basename(video_path)}")
+        os.makedirs(self.temp_segments_dir, exist_ok=True)
+        return self._split_with_ffmpeg(video_path, segment_length, progress_callback, None)
+    
+    def _split_with_ffmpeg(self, input_path: str, segment_length: int,
+                           progress_callback: Optional[Callable],
+                           duration: Optional[float]) -> Tuple[List[str], float]:
+        """
+        使用一个FFmpeg进程按固定时长切分音频，输出16kHz单声道WAV片段
+        
+        Args:
+            input_path: 输入音频或视频文件路径
+            segment_length: 每个片段的长度(秒)
+            progress_callback: 进度回调函数
+            duration: 音频时长(秒)，未知时只在结束时报告进度
+            
+        Returns:
+            (分割后的片段文件列表, FFmpeg实际处理的音频时长(秒))
+        """
+        with self._segment_subdir(input_path) as subdir:
+            output_dir = os.path.join(self.temp_segments_dir, subdir)
+            prefix = f"{subdir}_part"
+            # 文件名中的%需转义，避免被FFmpeg当作序号占位符
+            output_pattern = os.path.join(output_dir, f"{prefix.replace('%', '%%')}%03d.wav")
+            
+            expected_segments = int(duration + segment_length - 1) // segment_length if duration else 0
+            if progress_callback and expected_segments:
+                progress_callback(0, expected_segments, "准备分割音频")
+            
+            cmd = [
+                'ffmpeg', '-nostdin', '-hide_banner', '-loglevel', 'error',
+                '-i', input_path, '-vn',  # 只处理音轨，忽略视频流和封面图片
+                '-f', 'segment', '-segment_time', str(segment_length),
+                '-segment_start_number', '1', '-reset_timestamps', '1',
+                '-ac', '1', '-ar', '16000', '-c:a', 'pcm_s16le',  # 单声道，16kHz采样率
+                '-progress', 'pipe:1',
+                '-y', output_pattern
+            ]
+            
+            # stderr写入临时文件而不是管道：损坏的文件可能逐帧输出错误，管道写满后FFmpeg会阻塞，
+            # 而这里要读完stdout的进度才会读取stderr，两者互相等待
+            with tempfile.TemporaryFile() as stderr_file:
+                process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr_file,
+                                           universal_newlines=True, encoding='utf-8', errors='replace')
+                out_time_us = self._read_ffmpeg_progress(process, segment_length, expected_segments,
+                                                         progress_callback)
+                if process.wait() != 0:
+                    # 只保留stderr末尾的部分用于报错
+                    stderr_file.seek(0, os.SEEK_END)
+                    stderr_file.seek(max(0, stderr_file.tell() - self.STDERR_TAIL_BYTES))
+                    stderr = stderr_file.read().decode('utf-8', errors='replace')
+                    raise subprocess.CalledProcessError(process.returncode, cmd, stderr=stderr)
+            
+            # 按序号收集输出片段
+            segment_names = sorted(
+                (entry.name for entry in os.scandir(output_dir)
+                 if entry.name.startswith(prefix) and entry.name.endswith('.wav')
+                 and entry.name[len(prefix):-4].isdigit()),
+                key=lambda name: int(name[len(prefix):-4])
+            )
+            segment_files = [os.path.join(subdir, name) for name in segment_names]
+            
+            if progress_callback:
+                total = expected_segments or len(segment_files)
+                progress_callback(total, total, f"完成 - {len(segment_files)} 个片段")
+            
+            return segment_files, out_time_us / 1000000.0
+    
+    @staticmethod
+    def _read_ffmpeg_progress(process: subprocess.Popen, segment_length: int,
+                              expected_segments: int, progress_callback: Optional[Callable]) -> int:
+        """
+        读取FFmpeg -progress 输出直到结束，按已处理时长报告分割进度
+        
+        Args:
+            process: stdout为文本管道的FFmpeg进程
+            segment_length: 每个片段的长度(秒)
+            expected_segments: 预计片段数，为0时不报告进度
+            progress_callback: 进度回调函数
+            
+        Returns:
+            FFmpeg已处理的音频时长(微秒)
+        """
+        last_reported = 0
+        out_time_us = 0
+        for line in process.stdout:
+            # out_time_ms实际单位为微秒
+            if not line.startswith('out_time_ms='):
+                continue
+            value = line.split('=', 1)[1].strip()
+            if not value.isdigit():
+                continue
+            out_time_us = int(value)
+            if not (progress_callback and expected_segments):
+                continue
+            current = min(out_time_us // 1000000 // segment_length, expected_segments - 1)
+            if current > last_reported:
+                last_reported = current
+                progress_callback(current, expected_segments, f"导出片段 {current+1}/{expected_segments}")
+        return out_time_us
+    
+    def _split_with_pydub(self, input_path: str, segment_length: int,
+                          progress_callback: Optional[Callable],
+                          audio: Optional["AudioSegment"]) -> List[str]:
+        """
+        使用pydub逐段导出音频片段
+        
+        Args:
+            input_path: 输入音频文件路径
+            segment_length: 每个片段的长度(秒)
+            progress_callback: 进度回调函数
+            audio: 已解码的音频，提供时不再重复解码
+            
+        Returns:
+            分割后的片段文件列表
+        """
+        with self._segment_subdir(input_path) as subdir:
+            # 复用调用方已解码的音频，否则重新加载
+            if audio is None:
+                audio = self.load_audio(input_path)
             
             # 计算总时长（毫秒转秒）
             total_duration = len(audio) // 1000
@@ -63,8 +293,8 @@ class AudioSplitter:
             expected_segments = (total_duration + segment_length - 1) // segment_length
             
             # 报告初始进度
-            if self.progress_callback:
-                self.progress_callback(0, expected_segments, "准备分割音频")
+            if progress_callback:
+                progress_callback(0, expected_segments, "准备分割音频")
             
             segment_files = []
             
@@ -74,12 +304,12 @@ class AudioSplitter:
                 segment = audio[start*1000:end*1000]
                 
                 # 导出为WAV格式（兼容语音识别API）
-                output_filename = f"{os.path.splitext(filename)[0]}_part{i+1:03d}.wav"
+                output_filename = os.path.join(subdir, f"{subdir}_part{i+1:03d}.wav")
                 output_path = os.path.join(self.temp_segments_dir, output_filename)
                 
                 # 更新进度
-                if self.progress_callback:
-                    self.progress_callback(
+                if progress_callback:
+                    progress_callback(
                         i, 
                         expected_segments, 
                         f"导出片段 {i+1}/{expected_segments}"
@@ -100,18 +330,14 @@ class AudioSplitter:
                     raise
             
             # 完成进度
-            if self.progress_callback:
-                self.progress_callback(
+            if progress_callback:
+                progress_callback(
                     expected_segments, 
                     expected_segments, 
                     f"完成 - {len(segment_files)} 个片段"
                 )
             
             return segment_files
-            
-        except Exception as e:
-            logging.error(f"分割音频失败: {filename}: {str(e)}")
-            raise
 
     def extract_audio_from_video(self, video_path: str, output_folder: str, 
                                progress_callback: Optional[Callable] = None) -> tuple:
@@ -126,8 +352,6 @@ class AudioSplitter:
         Returns:
             tuple: (音频文件路径, 是否是新提取的), 失败则返回(None, False)
         """
-        import subprocess
-        
         try:
             video_filename = os.path.basename(video_path)
             base_name = os.path.splitext(video_filename)[0]
@@ -142,17 +366,18 @@ class AudioSplitter:
             if progress_callback:
                 progress_callback(0, 1, "准备提取音频")
             
-            # 使用FFmpeg提取音频
+            # 使用FFmpeg提取音频，只输出错误信息，避免为每次提取缓存大量日志输出
             cmd = [
-                'ffmpeg', '-i', video_path, 
+                'ffmpeg', '-nostdin', '-hide_banner', '-loglevel', 'error',
+                '-i', video_path, 
                 '-q:a', '0', '-map', 'a', audio_path, 
                 '-y'  # 覆盖已存在的文件
             ]
             
             logging.info(f"正在从视频提取音频: {video_filename}")
             
-            # 执行命令
-            process = subprocess.run(cmd, check=True, capture_output=True)
+            # 执行命令，音频直接写入文件，标准输出无需捕获
+            subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
             
             if os.path.exists(audio_path):
                 logging.info(f"音频提取成功: {audio_path}")
@@ -168,7 +393,8 @@ class AudioSplitter:
                 return None, False
                 
         except subprocess.CalledProcessError as e:
-            logging.error(f"FFmpeg处理失败: {e}")
+            stderr = e.stderr.decode('utf-8', errors='replace').strip() if e.stderr else ""
+            logging.error(f"FFmpeg处理失败: {e} {stderr}")
             if progress_callback:
                 progress_callback(1, 1, f"处理失败: FFmpeg错误")
             return None, False
@@ -177,3 +403,34 @@ class AudioSplitter:
             if progress_callback:
                 progress_callback(1, 1, f"处理失败: {str(e)}")
             return None, False
+
+
+def split_audio_in_process(input_path: str, temp_segments_dir: str, segment_length: int = 30,
+                           use_ffmpeg_segment: bool = True) -> List[str]:
+    """
+    供进程池调用的分割入口，只接受可pickle的参数
+    
+    Args:
+        input_path: 输入音频文件路径
+        temp_segments_dir: 存储临时片段的目录
+        segment_length: 每个片段的长度(秒)
+        use_ffmpeg_segment: 是否使用FFmpeg segment复用器分割
+        
+    Returns:
+        分割后的片段文件列表
+    """
+    splitter = AudioSplitter(temp_segments_dir, use_ffmpeg_segment=use_ffmpeg_segment)
+    return splitter.split_audio_file(input_path, segment_length)
+
+
+def audio_duration_in_process(input_path: str) -> float:
+    """
+    供进程池调用的时长获取入口，在子进程中解码音频，不占用调用进程的GIL和内存
+    
+    Args:
+        input_path: 输入音频文件路径
+        
+    Returns:
+        音频时长(秒)
+    """
+    return len(AudioSplitter.load_audio(input_path)) / 1000.0
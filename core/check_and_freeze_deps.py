@@ -3,11 +3,13 @@
 用于检查、冻结和安装项目依赖
 """
 import os
+import re
 import sys
 import subprocess
-import pkg_resources
 import argparse
-from typing import List, Optional
+import functools
+from importlib.metadata import distributions
+from typing import Dict, List, Optional
 
 CRITICAL_PACKAGES = {
     'watchdog': 'File monitoring',
@@ -16,34 +18,48 @@ CRITICAL_PACKAGES = {
     'pydub': 'Audio processing',
 }
 
+def _normalize_name(package_name: str) -> str:
+    """规范化包名，与pkg_resources的key一致(小写，非字母数字和点的连续字符替换为-)"""
+    return re.sub(r'[^A-Za-z0-9.]+', '-', package_name).lower()
+
+@functools.lru_cache(maxsize=None)
+def _installed_packages() -> Dict[str, str]:
+    """扫描一次已安装的包，返回 {规范化包名: 版本}，同名包以sys.path中靠前的为准"""
+    installed: Dict[str, str] = {}
+    for dist in distributions():
+        name = dist.metadata['Name']
+        if name:
+            installed.setdefault(_normalize_name(name), dist.version)
+    return installed
+
 def check_package_installed(package_name: str) -> bool:
     """检查包是否已安装"""
-    try:
-        pkg_resources.get_distribution(package_name)
-        return True
-    except pkg_resources.DistributionNotFound:
-        return False
+    return _normalize_name(package_name) in _installed_packages()
 
 def get_package_version(package_name: str) -> Optional[str]:
     """获取已安装包的版本"""
-    try:
-        return pkg_resources.get_distribution(package_name).version
-    except pkg_resources.DistributionNotFound:
-        return None
+    return _installed_packages().get(_normalize_name(package_name))
 
 def install_package(package_name: str) -> bool:
     """安装指定的包"""
+    return install_packages([package_name])
+
+def install_packages(package_names: List[str]) -> bool:
+    """在一次pip调用中安装多个包，依赖解析只需进行一次"""
     try:
-        subprocess.check_call([sys.executable, "-m", "pip", "install", package_name])
+        subprocess.check_call([sys.executable, "-m", "pip", "install", *package_names])
         return True
     except subprocess.CalledProcessError:
         return False
+    finally:
+        # 已安装包发生变化，下次检查时重新扫描
+        _installed_packages.cache_clear()
 
 def freeze_requirements(output_file: str = "requirements.txt"):
     """冻结当前环境的依赖到文件"""
     try:
         # 获取所有已安装的包
-        installed = {pkg.key: pkg.version for pkg in pkg_resources.working_set}
+        installed = _installed_packages()
         
         # 确保关键包被包含
         requirements = []
@@ -107,7 +123,9 @@ def main():
                               help="Requirements file (default: requirements.txt)")
     
     # check命令
-    subparsers.add_parser("check", help="Check critical packages")
+    check_parser = subparsers.add_parser("check", help="Check critical packages")
+    check_parser.add_argument("--yes", "-y", action="store_true",
+                            help="Install missing packages without prompting (also enabled by CI=1)")
     
     args = parser.parse_args()
     
@@ -124,14 +142,22 @@ def main():
     elif args.command == "check":
         missing = check_critical_packages()
         if missing:
-            print("\nSome critical packages are missing. Install them? [y/N]")
-            if input().lower() == 'y':
-                for package in missing:
-                    print(f"\nInstalling {package}...")
-                    if install_package(package):
-                        print(f"{package} installed successfully")
-                    else:
-                        print(f"Failed to install {package}")
+            if args.yes or os.environ.get("CI"):
+                confirmed = True
+            elif sys.stdin.isatty():
+                print("\nSome critical packages are missing. Install them? [y/N]")
+                confirmed = input().lower() == 'y'
+            else:
+                # 非交互环境(stdin已关闭或被重定向)中不等待输入，直接跳过安装
+                print("\nSome critical packages are missing. Run with --yes to install them.")
+                confirmed = False
+            
+            if confirmed:
+                print(f"\nInstalling {' '.join(missing)}...")
+                if install_packages(missing):
+                    print("Missing packages installed successfully")
+                else:
+                    print("Failed to install missing packages")
             sys.exit(len(missing))
         else:
             print("All critical packages are installed")
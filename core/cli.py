@@ -1,9 +1,28 @@
 import argparse
+import functools
 import os
 from typing import Dict, Any
 
 from utils import LogConfig
 
+# 默认参数，get_default_args返回其副本
+_DEFAULT_ARGS: Dict[str, Any] = {
+    'media_folder': './media',  # 更改为media_folder
+    'output_folder': './output',
+    'max_retries': 3,
+    'max_workers': 4,
+    'use_jianying_first': True,
+    'use_kuaishou': True,
+    'use_bcut': True,
+    'format_text': True,
+    'include_timestamps': True,
+    'show_progress': True,
+    'process_video': True,  # 新增：是否处理视频文件
+    'video_extensions': ('.mp4', '.mov', '.avi'),  # 新增：视频文件扩展名
+    'extract_audio_only': False,  # 新增：仅提取音频不进行识别
+    'log_mode': LogConfig.NORMAL
+}
+
 def parse_args() -> Dict[str, Any]:
     """
     解析命令行参数
@@ -11,7 +30,20 @@ def parse_args() -> Dict[str, Any]:
     Returns:
         包含解析后参数的字典
     """
-    defaults = get_default_args()
+    args = vars(_build_parser().parse_args())  # 转换为字典
+    # 解析器会被复用，列表参数转为新列表，避免调用方修改影响下次解析的默认值
+    args['video_extensions'] = list(args['video_extensions'])
+    return args
+
+@functools.lru_cache(maxsize=1)
+def _build_parser() -> argparse.ArgumentParser:
+    """
+    构建命令行解析器，只构建一次后复用
+    
+    Returns:
+        命令行参数解析器
+    """
+    defaults = _DEFAULT_ARGS
     parser = argparse.ArgumentParser(
         description='将媒体文件(音频或视频)转为文本',
         formatter_class=argparse.ArgumentDefaultsHelpFormatter
@@ -60,8 +92,7 @@ def parse_args() -> Dict[str, Any]:
     parser.add_argument('--log_mode', choices=['VERBOSE', 'NORMAL', 'QUIET'], default=defaults['log_mode'],
                         help='日志级别：VERBOSE(详细)、NORMAL(正常)、QUIET(静默)')
     
-    args = parser.parse_args()
-    return vars(args)  # 转换为字典
+    return parser
 
 def get_default_args() -> Dict[str, Any]:
     """
@@ -70,19 +101,6 @@ def get_default_args() -> Dict[str, Any]:
     Returns:
         包含默认参数的字典
     """
-    return {
-        'media_folder': './media',  # 更改为media_folder
-        'output_folder': './output',
-        'max_retries': 3,
-        'max_workers': 4,
-        'use_jianying_first': True,
-        'use_kuaishou': True,
-        'use_bcut': True,
-        'format_text': True,
-        'include_timestamps': True,
-        'show_progress': True,
-        'process_video': True,  # 新增：是否处理视频文件
-        'video_extensions': ['.mp4', '.mov', '.avi'],  # 新增：视频文件扩展名
-        'extract_audio_only': False,  # 新增：仅提取音频不进行识别
-        'log_mode': LogConfig.NORMAL
-    }
+    defaults = dict(_DEFAULT_ARGS)
+    defaults['video_extensions'] = list(_DEFAULT_ARGS['video_extensions'])
+    return defaults
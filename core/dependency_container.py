@@ -15,6 +15,8 @@ class DependencyContainer:
         self._dependencies: Dict[str, Any] = {}
         self._factories: Dict[str, Callable] = {}
         self._singletons: Dict[str, bool] = {}
+        # 已解析且之后总是返回同一对象的单例，get时一次字典查找即可返回
+        self._resolved: Dict[str, Any] = {}
 
     def register(self, name: str, instance_or_class: Any, singleton: bool = True):
         """
@@ -27,6 +29,7 @@ class DependencyContainer:
         """
         self._dependencies[name] = instance_or_class
         self._singletons[name] = singleton
+        self._resolved.pop(name, None)
         logging.debug(f"已注册依赖: {name}")
 
     def register_factory(self, name: str, factory: Callable, singleton: bool = True):
@@ -40,12 +43,36 @@ class DependencyContainer:
         """
         self._factories[name] = factory
         self._singletons[name] = singleton
+        self._resolved.pop(name, None)
         logging.debug(f"已注册工厂: {name}")
 
     def get(self, name: str) -> Any:
         """
         获取依赖实例
         
+        Args:
+            name: 依赖名称
+            
+        Returns:
+            依赖实例
+        """
+        try:
+            return self._resolved[name]
+        except KeyError:
+            pass
+        
+        instance = self._resolve(name)
+        
+        # 单例实例之后总是原样返回，缓存以跳过下面的逐项判断
+        if self._singletons.get(name, True) and self._dependencies.get(name) is instance \
+                and not isinstance(instance, type):
+            self._resolved[name] = instance
+        return instance
+
+    def _resolve(self, name: str) -> Any:
+        """
+        按注册信息解析依赖实例
+        
         Args:
             name: 依赖名称
             
@@ -82,6 +109,7 @@ class DependencyContainer:
         self._dependencies.clear()
         self._factories.clear()
         self._singletons.clear()
+        self._resolved.clear()
 
 
 # 创建一个全局容器实例
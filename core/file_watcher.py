@@ -19,7 +19,8 @@ class AudioFileHandler(FileSystemEventHandler):
             extensions: 要监听的文件扩展名列表，默认为常见音频格式
         """
         self.processor = processor
-        self.audio_extensions = extensions or ['.mp3', '.wav', '.m4a', '.flac', '.ogg', '.aac', '.mp4']
+        # 统一小写并使用frozenset，扩展名判断为一次哈希查找
+        self.audio_extensions = frozenset(ext.lower() for ext in (extensions or ['.mp3', '.wav', '.m4a', '.flac', '.ogg', '.aac', '.mp4']))
         self.processing_queue = Queue()
         self.processed_files = set()  # 已处理的文件跟踪
         self._start_worker_thread()
@@ -1,8 +1,13 @@
 import logging
+import sys
 from typing import Dict, Optional, Any
 
 from .utils import ProgressBar
 
+def _noop(*args, **kwargs) -> None:
+    """不显示进度条时替代各进度条方法的空操作"""
+    return None
+
 class ProgressManager:
     """管理多个进度条的帮助类"""
     
@@ -15,6 +20,11 @@ class ProgressManager:
         """
         self.show_progress = show_progress
         self.progress_bars: Dict[str, ProgressBar] = {}
+        
+        # 不显示进度条时不会创建任何进度条，直接在实例上换成空操作，
+        # 省去逐片段更新时的字典查找和判断
+        if not show_progress:
+            self.create_progress_bar = self.update_progress = self.finish_progress = _noop
     
     def has_progress_bar(self, name: str) -> bool:
         """
@@ -28,6 +38,18 @@ class ProgressManager:
         """
         return name in self.progress_bars
     
+    def get_progress_bar(self, name: str) -> Optional[ProgressBar]:
+        """
+        获取指定名称的进度条
+        
+        Args:
+            name: 进度条名称
+            
+        Returns:
+            对应的进度条，不存在时返回None
+        """
+        return self.progress_bars.get(name)
+    
     def create_progress_bar(self, name: str, total: int, prefix: str, suffix: str = "") -> Optional[ProgressBar]:
         """
         创建并存储一个进度条
@@ -45,7 +67,8 @@ class ProgressManager:
             return None
             
         progress_bar = ProgressBar(total=total, prefix=prefix, suffix=suffix)
-        self.progress_bars[name] = progress_bar
+        # 驻留名称字符串，后续用同名字面量查找时可直接按身份比较
+        self.progress_bars[sys.intern(name)] = progress_bar
         return progress_bar
     
     def update_progress(self, name: str, current: Optional[int] = None, suffix: Optional[str] = None) -> None:
@@ -57,10 +80,12 @@ class ProgressManager:
             current: 当前进度
             suffix: 新的后缀文本
         """
-        if not self.show_progress or name not in self.progress_bars:
+        # 单次查找代替 in 判断加下标访问
+        progress_bar = self.progress_bars.get(name)
+        if progress_bar is None:
             return
             
-        self.progress_bars[name].update(current, suffix)
+        progress_bar.update(current, suffix)
     
     def finish_progress(self, name: str, suffix: Optional[str] = None) -> None:
         """
@@ -70,11 +95,11 @@ class ProgressManager:
             name: 进度条名称
             suffix: 完成时的后缀文本
         """
-        if not self.show_progress or name not in self.progress_bars:
+        progress_bar = self.progress_bars.pop(name, None)
+        if progress_bar is None:
             return
             
-        self.progress_bars[name].finish(suffix)
-        del self.progress_bars[name]
+        progress_bar.finish(suffix)
     
     def close_all_progress_bars(self, suffix: str = "已终止") -> None:
         """
@@ -1,6 +1,36 @@
 import re
 import logging
-from typing import List, Dict, Optional
+import functools
+from typing import List, Dict, Optional, Callable, Tuple
+
+# 预编译的正则表达式，避免每个片段格式化时重复查找编译缓存
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+# 汉字之间的空格
+_CJK_SPACE_PATTERN = re.compile(r'([\u4e00-\u9fa5])\s+([\u4e00-\u9fa5])')
+# 中文句子结束标志
+_SENTENCE_END_PATTERN = re.compile(r'([。！？\.\!\?]+)(\s*)')
+
+
+@functools.lru_cache(maxsize=4096)
+def _format_whole_seconds(seconds: int) -> str:
+    """
+    将整数秒格式化为 mm:ss 或 hh:mm:ss
+    
+    相邻片段的结束时间即下一片段的开始时间，同一秒数会被重复格式化，结果直接缓存
+    """
+    # 不足一小时的音频最常见，只需一次divmod
+    if 0 <= seconds < 3600:
+        m, s = divmod(seconds, 60)
+        return f"{m:02d}:{s:02d}"
+    
+    m, s = divmod(seconds, 60)
+    h, m = divmod(m, 60)
+    
+    if h > 0:
+        return f"{h:02d}:{m:02d}:{s:02d}"
+    else:
+        return f"{m:02d}:{s:02d}"
+
 
 class TextFormatter:
     """
@@ -12,7 +42,9 @@ class TextFormatter:
                            timestamps: Optional[List[Dict[str, float]]] = None,
                            include_timestamps: bool = False,
                            paragraph_min_length: int = 100,
-                           separate_segments: bool = True) -> str:
+                           separate_segments: bool = True,
+                           segment_length: Optional[float] = None,
+                           start_index: int = 0) -> str:
         """
         格式化文本段落，使其更易于阅读
         
@@ -22,6 +54,8 @@ class TextFormatter:
             include_timestamps: 是否在输出中包含时间戳
             paragraph_min_length: 段落的最小长度，超过此长度会被视为段落
             separate_segments: 是否为每个30秒分片添加分隔符
+            segment_length: 固定的片段长度(秒)，未提供timestamps时据此直接计算时间戳
+            start_index: 第一个片段的全局序号，与segment_length一起计算时间戳
             
         Returns:
             格式化后的文本
@@ -30,28 +64,21 @@ class TextFormatter:
         if not segment_texts:
             return ""
         
+        # 固定长度片段只需首尾时间即可表示总时长，逐片段时间戳在输出时计算
+        if timestamps is None and segment_length and not separate_segments:
+            timestamps = [{'start': start_index * segment_length,
+                           'end': (start_index + len(segment_texts)) * segment_length}]
+        
         # 根据separate_segments参数决定处理方式
         if separate_segments:
-            # 为每个原始分片添加分隔符，保持片段独立
-            formatted_segments = []
-            for i, text in enumerate(segment_texts):
-                if not text or text == "[无法识别的音频片段]":
-                    continue
-                
-                # 处理文本：将空格替换为逗号，确保句子末尾有句号
-                processed_text = TextFormatter._process_segment_text(text)
-                
-                # 添加时间戳（如果需要）
-                if include_timestamps and timestamps and i < len(timestamps):
-                    time_start = timestamps[i]['start']
-                    time_end = timestamps[i]['end']
-                    time_info = f"[{TextFormatter._format_time(time_start)}-{TextFormatter._format_time(time_end)}] "
-                    formatted_segments.append(f"{time_info}{processed_text}")
-                else:
-                    formatted_segments.append(processed_text)
-                    
+            # 为每个原始分片添加分隔符，保持片段独立，逐个格式化后直接拼接，不保留中间列表
+            formatted_segments = (
+                TextFormatter._format_one(i, text, timestamps, include_timestamps,
+                                          segment_length, start_index)
+                for i, text in enumerate(segment_texts)
+            )
             # 用新行分隔每个片段
-            return "\n\n".join(formatted_segments)
+            return "\n\n".join(segment for segment in formatted_segments if segment is not None)
         else:
             # 原来的处理方式，合并所有文本并替换无法识别的部分
             raw_text = " ".join([text for text in segment_texts if text and text != "[无法识别的音频片段]"])
@@ -59,7 +86,7 @@ class TextFormatter:
                 return "[未能成功识别任何内容]"
             
             # 移除多余的空格
-            raw_text = re.sub(r'\s+', ' ', raw_text).strip()
+            raw_text = _WHITESPACE_PATTERN.sub(' ', raw_text).strip()
             
             # 基于标点符号和句子长度智能分段
             formatted_paragraphs = TextFormatter._split_into_paragraphs(raw_text, paragraph_min_length)
@@ -70,6 +97,51 @@ class TextFormatter:
             
             return "\n\n".join(formatted_paragraphs)
     
+    @staticmethod
+    def _format_one(i: int, text: str,
+                    timestamps: Optional[List[Dict[str, float]]],
+                    include_timestamps: bool,
+                    segment_length: Optional[float],
+                    start_index: int) -> Optional[str]:
+        """
+        格式化单个30秒片段，识别失败的片段返回None
+        
+        Args:
+            i: 片段在segment_texts中的索引
+            text: 片段文本
+            timestamps: 对应的时间戳信息，可为None
+            include_timestamps: 是否添加时间戳
+            segment_length: 固定的片段长度(秒)，未提供timestamps时据此计算时间戳
+            start_index: 第一个片段的全局序号
+            
+        Returns:
+            格式化后的片段文本，需要跳过时返回None
+        """
+        if not text or text == "[无法识别的音频片段]":
+            return None
+        
+        # 处理文本：将空格替换为逗号，确保句子末尾有句号
+        processed_text = TextFormatter._process_segment_text(text)
+        
+        # 添加时间戳（如果需要），固定长度片段按序号直接计算
+        time_span = None
+        if include_timestamps:
+            if timestamps:
+                if i < len(timestamps):
+                    time_span = (timestamps[i]['start'], timestamps[i]['end'])
+            elif segment_length:
+                time_start = (start_index + i) * segment_length
+                time_span = (time_start, time_start + segment_length)
+        
+        return TextFormatter._with_time_span(processed_text, time_span)
+    
+    @staticmethod
+    def _with_time_span(text: str, time_span: Optional[Tuple[float, float]]) -> str:
+        """为片段文本加上 [开始-结束] 时间前缀，time_span为None时原样返回"""
+        if not time_span:
+            return text
+        return f"[{TextFormatter._format_time(time_span[0])}-{TextFormatter._format_time(time_span[1])}] {text}"
+    
     @staticmethod
     def _process_segment_text(text: str) -> str:
         """
@@ -77,12 +149,13 @@ class TextFormatter:
         1. 将空格替换为逗号
         2. 确保句子末尾有句号
         """
-        # 移除多余的空格，保留单词间的空格
-        text = re.sub(r'\s+', ' ', text).strip()
+        # 移除多余的空格，保留单词间的空格（str.split按任意空白切分，与\s+一致）
+        text = " ".join(text.split())
         
         # 中文内容中替换空格为逗号
-        # 匹配汉字之间的空格
-        text = re.sub(r'([\u4e00-\u9fa5])\s+([\u4e00-\u9fa5])', r'\1，\2', text)
+        # 匹配汉字之间的空格，合并后不含空格的文本无需再做正则替换
+        if " " in text:
+            text = _CJK_SPACE_PATTERN.sub(r'\1，\2', text)
         
         # 处理句尾标点
         last_char = text[-1] if text else ""
@@ -100,42 +173,39 @@ class TextFormatter:
         2. 考虑段落长度，过长的段落会被再次分割
         3. 规范标点符号前后的空格
         """
-        # 中文句子结束标志
-        sentence_end_pattern = r'([。！？\.\!\?]+)(\s*)'
-        
         # 首先规范化标点符号
-        text = re.sub(sentence_end_pattern, r'\1 ', text)
+        text = _SENTENCE_END_PATTERN.sub(r'\1 ', text)
         
-        # 按句子分割
-        sentences = re.split(sentence_end_pattern, text)
-        # 过滤空字符串并重组句子
+        # 单次遍历按句子切分，每个句子包含句末标点，不含其后的空白
         cleaned_sentences = []
-        current_sentence = ""
+        sentence_start = 0
+        for match in _SENTENCE_END_PATTERN.finditer(text):
+            cleaned_sentences.append(text[sentence_start:match.start(2)])
+            sentence_start = match.end()
+        cleaned_sentences.append(text[sentence_start:])
         
-        for i in range(0, len(sentences), 3):
-            if i < len(sentences):
-                current_sentence = sentences[i]
-                if i+1 < len(sentences):
-                    current_sentence += sentences[i+1]  # 添加标点
-                cleaned_sentences.append(current_sentence)
-        
-        # 合并短句子形成段落
+        # 合并短句子形成段落，句子先收集到列表并记录长度，段落结束时只拼接一次
         paragraphs = []
-        current_paragraph = ""
+        current_sentences: List[str] = []
+        current_length = 0
         
         for sentence in cleaned_sentences:
-            if not sentence.strip():
+            sentence = sentence.strip()
+            if not sentence:
                 continue
                 
-            if len(current_paragraph) + len(sentence) > min_length and current_paragraph:
-                paragraphs.append(current_paragraph.strip())
-                current_paragraph = sentence
+            if current_length + len(sentence) > min_length and current_sentences:
+                paragraphs.append(" ".join(current_sentences))
+                current_sentences = [sentence]
+                current_length = len(sentence)
             else:
-                current_paragraph = (current_paragraph + " " + sentence).strip()
+                # 与已有句子之间以一个空格连接
+                current_length += len(sentence) + 1 if current_sentences else len(sentence)
+                current_sentences.append(sentence)
         
         # 添加最后一个段落
-        if current_paragraph:
-            paragraphs.append(current_paragraph.strip())
+        if current_sentences:
+            paragraphs.append(" ".join(current_sentences))
         
         return paragraphs
     
@@ -176,10 +246,71 @@ class TextFormatter:
         """
         将秒数格式化为 mm:ss 格式
         """
-        m, s = divmod(int(seconds), 60)
-        h, m = divmod(m, 60)
+        return _format_whole_seconds(int(seconds))
+
+
+class OrderedSegmentWriter:
+    """
+    按片段顺序流式输出识别结果
+    
+    识别结果按完成顺序乱序到达，先暂存起来；一旦从下一个待输出的片段起形成连续前缀，
+    就立即格式化并交给write输出，不必等全部片段识别完再整体拼接。
+    输出内容与 TextFormatter.format_segment_text(separate_segments=True) 一致
+    """
+    
+    def __init__(self, write: Callable[[str], None], total: int,
+                 format_text: bool = True, include_timestamps: bool = False,
+                 segment_length: float = 30, start_index: int = 0):
+        """
+        Args:
+            write: 接收格式化文本的输出函数
+            total: 片段总数
+            format_text: 是否格式化片段文本，为False时原样输出
+            include_timestamps: 是否添加时间戳（仅在format_text为True时生效）
+            segment_length: 每个片段的长度(秒)
+            start_index: 第一个片段的全局序号，用于计算连续时间戳
+        """
+        self._write = write
+        self.total = total
+        self.format_text = format_text
+        self.include_timestamps = include_timestamps
+        self.segment_length = segment_length
+        self.start_index = start_index
+        self._pending: Dict[int, Optional[str]] = {}
+        self._next = 0
+        self._written = False
+    
+    def add(self, index: int, text: Optional[str]) -> None:
+        """
+        提交一个片段的识别结果
         
-        if h > 0:
-            return f"{h:02d}:{m:02d}:{s:02d}"
-        else:
-            return f"{m:02d}:{s:02d}"
+        Args:
+            index: 片段索引(从0开始)
+            text: 识别文本，识别失败时为None
+        """
+        self._pending[index] = text
+        while self._next in self._pending:
+            self._emit(self._next, self._pending.pop(self._next))
+            self._next += 1
+    
+    def close(self) -> None:
+        """输出剩余片段，未提交结果的片段(被取消或超时)按识别失败处理"""
+        while self._next < self.total:
+            self._emit(self._next, self._pending.pop(self._next, None))
+            self._next += 1
+        self._pending.clear()
+    
+    def _emit(self, index: int, text: Optional[str]) -> None:
+        """格式化并输出单个片段，跳过识别失败的片段"""
+        if not text or text == "[无法识别的音频片段]":
+            return
+        
+        if self.format_text:
+            time_span = None
+            if self.include_timestamps:
+                time_start = (self.start_index + index) * self.segment_length
+                time_span = (time_start, time_start + self.segment_length)
+            text = TextFormatter._with_time_span(TextFormatter._process_segment_text(text), time_span)
+        
+        self._write(f"\n\n{text}" if self._written else text)
+        self._written = True
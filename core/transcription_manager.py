@@ -1,287 +1,592 @@
 """音频转录管理器，管理音频片段的识别过程和重试机制"""
 
 import os
+import json
 import time
+import queue
+import hashlib
+import itertools
 import logging
+import threading
+import subprocess
 import concurrent.futures
-from typing import Dict, List, Optional, Tuple, Any, Callable
+from typing import Dict, List, Optional, Tuple, Any, Callable, Union
 from .asr_manager import ASRManager
+from .audio_splitter import AudioSplitter
+from .utils import write_text_atomic
+
+def default_max_workers() -> int:
+    """
+    未指定线程数时的默认识别线程数
+    
+    识别请求发往远程ASR服务，线程大部分时间在等待网络，线程数可以远大于CPU核数
+    (远程服务一般取40-80，以服务端限流为上限)；接入本地CPU模型时应改为 os.cpu_count()-1。
+    可通过环境变量ASR_MAX_WORKERS覆盖
+    
+    Returns:
+        默认线程数
+    """
+    env_value = os.environ.get("ASR_MAX_WORKERS")
+    if env_value:
+        try:
+            return max(1, int(env_value))
+        except ValueError:
+            logging.warning(f"ASR_MAX_WORKERS 不是有效的整数: {env_value}，使用自动值")
+    return min(64, (os.cpu_count() or 4) * 8)
 
 class TranscriptionManager:
     """音频转录管理器，负责多线程识别音频片段和重试管理"""
     
+    # 逐片段进度回调的最小间隔(秒)，间隔内的更新合并为一次
+    PROGRESS_MIN_INTERVAL = 0.2
+    
+    # 识别结果缓存格式版本，计入缓存键，键的计算方式变化时递增使旧结果失效
+    CACHE_VERSION = 1
+    
     def __init__(self, asr_manager: ASRManager, temp_segments_dir: str,
-                 max_workers: int = 4, max_retries: int = 3,
-                 progress_callback: Optional[Callable] = None):
+                 max_workers: Optional[int] = None, max_retries: int = 3,
+                 progress_callback: Optional[Callable] = None,
+                 batch_size: int = 1, cache_file: Optional[str] = None,
+                 cache_max_entries: int = 100000):
         """
         初始化转录管理器
         
         Args:
             asr_manager: ASR管理器实例
             temp_segments_dir: 临时片段目录路径
-            max_workers: 最大并发工作线程数
+            max_workers: 最大并发工作线程数，None时见 default_max_workers
             max_retries: 最大重试次数
             progress_callback: 进度回调函数
+            batch_size: 每次提交给ASR的片段数，大于1时按批调用asr_manager.recognize_batch
+            cache_file: 识别结果缓存文件(JSONL)，按ASR服务配置和片段音频内容的SHA-256保存识别文本，
+                重新处理时内容相同的片段直接使用缓存结果；None表示不缓存
+            cache_max_entries: 缓存保留的最大条目数，加载时超出的最早条目被丢弃并压缩缓存文件
         """
         self.asr_manager = asr_manager
         self.temp_segments_dir = temp_segments_dir
-        self.max_workers = max_workers
+        self.max_workers = max_workers or default_max_workers()
         self.max_retries = max_retries
         self.progress_callback = progress_callback
+        self.batch_size = max(1, batch_size)
         self.interrupt_received = False
         
+        # 识别结果缓存 {缓存键: 识别文本}，新结果以追加方式写入缓存文件；
+        # 缓存键为 服务配置标识+音频内容 的哈希，切换ASR服务配置后不会命中其他配置的结果
+        self.cache_file = cache_file
+        self.cache_max_entries = max(1, cache_max_entries)
+        self._cache_prefix = (f"v{self.CACHE_VERSION};{asr_manager.cache_fingerprint()}\0".encode('utf-8')
+                              if cache_file else b"")
+        self._cache: Dict[str, str] = self._load_cache() if cache_file else {}
+        self._cache_lock = threading.Lock()
+        self._cache_fp = None
+        
+        # 各调用线程复用的识别线程池，close后generation递增，各线程下次使用时重新创建
+        self._executor_local = threading.local()
+        self._executors: List[concurrent.futures.ThreadPoolExecutor] = []
+        self._executors_lock = threading.Lock()
+        self._executor_generation = 0
+        
+        # 进度回调限流，多个文件并行识别时共用同一转录管理器
+        self._progress_lock = threading.Lock()
+        self._last_progress_time = 0.0
+        
     def set_interrupt_flag(self, value: bool = True):
         """设置中断标志"""
         self.interrupt_received = value
     
+    def _report_progress(self, current: int, total: int, message: Union[str, Callable[[], str]],
+                         force: bool = False):
+        """
+        调用进度回调，距上次回调不足PROGRESS_MIN_INTERVAL秒的更新直接丢弃
+        
+        Args:
+            current: 当前完成数
+            total: 总数
+            message: 状态文本，或生成状态文本的函数(只在回调确实执行时调用)
+            force: 是否忽略限流(开始、结束和取消等需要立即显示的状态)
+        """
+        if not self.progress_callback:
+            return
+        
+        now = time.monotonic()
+        with self._progress_lock:
+            if not force and now - self._last_progress_time < self.PROGRESS_MIN_INTERVAL:
+                return
+            self._last_progress_time = now
+        
+        try:
+            self.progress_callback(current, total, message() if callable(message) else message)
+        except Exception as e:
+            logging.warning(f"进度回调出错: {str(e)}")
+    
     def recognize_audio(self, audio_path: str) -> Optional[str]:
-        """识别单个音频片段"""
-        return self.asr_manager.recognize_audio(audio_path)
+        """识别单个音频片段，启用缓存时内容相同的片段直接返回缓存结果"""
+        if not self.cache_file:
+            return self.asr_manager.recognize_audio(audio_path)
+        
+        # 读取一次片段数据，计算哈希后直接交给ASR，不再重复读取文件
+        try:
+            with open(audio_path, 'rb') as f:
+                audio_data = f.read()
+        except OSError:
+            return self.asr_manager.recognize_audio(audio_path)
+        
+        hasher = self._new_hasher()
+        hasher.update(audio_data)
+        key = hasher.hexdigest()
+        text = self._cache.get(key)
+        if text is not None:
+            logging.debug(f"  ├─ 使用缓存结果: {os.path.basename(audio_path)}")
+            return text
+        
+        text = self.asr_manager.recognize_audio(audio_path, audio_data=audio_data)
+        if text:
+            self._store_cache(key, text)
+        return text
+    
+    def _load_cache(self) -> Dict[str, str]:
+        """
+        加载识别结果缓存，条目超过cache_max_entries时丢弃最早的条目；
+        文件中有重复、损坏或被丢弃的行时重写为压缩后的内容，避免缓存文件无限增长
+        
+        Returns:
+            {缓存键: 识别文本}
+        """
+        cache: Dict[str, str] = {}
+        line_count = 0
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line_count += 1
+                    try:
+                        cache.update(json.loads(line))
+                    except (ValueError, TypeError):
+                        # 写入中断时最后一行可能不完整
+                        continue
+        except FileNotFoundError:
+            return cache
+        except OSError as e:
+            logging.warning(f"读取识别结果缓存失败: {str(e)}")
+            return cache
+        
+        # 新结果追加在文件末尾，超出上限时丢弃最早写入的条目
+        for key in list(itertools.islice(cache, max(0, len(cache) - self.cache_max_entries))):
+            del cache[key]
+        
+        if line_count > len(cache):
+            try:
+                write_text_atomic(self.cache_file, "".join(
+                    json.dumps({key: text}, ensure_ascii=False) + '\n' for key, text in cache.items()))
+                logging.info(f"识别结果缓存已压缩: {line_count} 行 -> {len(cache)} 条")
+            except OSError as e:
+                logging.warning(f"压缩识别结果缓存失败: {str(e)}")
+        return cache
+    
+    def _new_hasher(self):
+        """创建已写入服务配置标识的SHA-256对象，用于计算缓存键"""
+        return hashlib.sha256(self._cache_prefix)
+    
+    def _content_key(self, audio_path: str) -> Optional[str]:
+        """计算服务配置标识和片段音频内容的SHA-256，读取失败时返回None"""
+        try:
+            with open(audio_path, 'rb') as f:
+                return hashlib.file_digest(f, self._new_hasher).hexdigest()
+        except OSError:
+            return None
+    
+    def _store_cache(self, key: str, text: str):
+        """保存一条识别结果到内存缓存并追加写入缓存文件"""
+        with self._cache_lock:
+            self._cache[key] = text
+            try:
+                if self._cache_fp is None:
+                    self._cache_fp = open(self.cache_file, 'a', encoding='utf-8', buffering=1)
+                self._cache_fp.write(json.dumps({key: text}, ensure_ascii=False) + '\n')
+            except OSError as e:
+                logging.warning(f"写入识别结果缓存失败: {str(e)}")
+    
+    def _get_executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        """
+        获取当前线程使用的识别线程池，不存在时创建
+        
+        每个调用线程(如并行处理的各个文件)各用一个线程池，并发数与每次调用新建线程池时相同，
+        同一文件的多个部分、之后的文件都复用已创建的线程
+        """
+        local = self._executor_local
+        if getattr(local, 'generation', None) != self._executor_generation:
+            local.executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="asr_segment")
+            local.generation = self._executor_generation
+            with self._executors_lock:
+                self._executors.append(local.executor)
+        return local.executor
+    
+    def _discard_executor(self):
+        """关闭当前线程的识别线程池并取消未开始的任务，下次调用时重新创建"""
+        executor = getattr(self._executor_local, 'executor', None)
+        if executor is None:
+            return
+        executor.shutdown(wait=False, cancel_futures=True)
+        self._executor_local.generation = None
+        with self._executors_lock:
+            if executor in self._executors:
+                self._executors.remove(executor)
+    
+    def close(self):
+        """关闭识别线程池和识别结果缓存文件，之后再次识别时重新创建"""
+        with self._executors_lock:
+            executors, self._executors = self._executors, []
+            self._executor_generation += 1
+        for executor in executors:
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        with self._cache_lock:
+            if self._cache_fp is not None:
+                self._cache_fp.close()
+                self._cache_fp = None
+    
+    def _submit_segments(self, executor: concurrent.futures.Executor,
+                         segment_files: List[str]) -> Dict[concurrent.futures.Future, Tuple[int, str]]:
+        """
+        提交识别任务
+        
+        batch_size大于1时，片段按文件大小从大到小排序后分批提交，使同批片段时长相近，
+        且耗时最长的批次最先开始，不会在末尾拖长总耗时；
+        每个片段仍对应一个独立的Future，批次完成后将结果分发回各片段
+        
+        单个提交时保持片段顺序：固定长度分割的片段时长相同，按序完成才能让结果尽早按顺序输出
+        
+        Args:
+            executor: 线程池
+            segment_files: 音频片段文件名列表
+        
+        Returns:
+            {Future: (片段索引, 片段文件名)}
+        """
+        paths = [os.path.join(self.temp_segments_dir, segment_file) for segment_file in segment_files]
+        
+        if self.batch_size == 1:
+            return {executor.submit(self.recognize_audio, path): (i, segment_files[i])
+                    for i, path in enumerate(paths)}
+        
+        future_to_segment = {}
+        order = sorted(range(len(paths)), key=lambda i: os.path.getsize(paths[i]), reverse=True)
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            futures = [concurrent.futures.Future() for _ in batch]
+            for i, future in zip(batch, futures):
+                future_to_segment[future] = (i, segment_files[i])
+            executor.submit(self._recognize_batch, [paths[i] for i in batch], futures)
+        
+        return future_to_segment
+    
+    def _recognize_batch(self, paths: List[str], futures: List[concurrent.futures.Future]):
+        """
+        识别一批片段，并将结果写回对应的Future
+        
+        Args:
+            paths: 片段文件路径列表
+            futures: 与paths一一对应的Future列表
+        """
+        # 跳过开始前已被取消的片段
+        pending = [(path, future) for path, future in zip(paths, futures)
+                   if future.set_running_or_notify_cancel()]
+        
+        # 启用缓存时先用缓存结果完成对应片段，只把未命中的片段交给ASR
+        if self.cache_file:
+            uncached = []
+            for path, future in pending:
+                key = self._content_key(path)
+                text = self._cache.get(key) if key else None
+                if text is not None:
+                    future.set_result(text)
+                else:
+                    uncached.append((path, future, key))
+        else:
+            uncached = [(path, future, None) for path, future in pending]
+        if not uncached:
+            return
+        
+        try:
+            texts = self.asr_manager.recognize_batch([path for path, _, _ in uncached])
+        except Exception as e:
+            for _, future, _ in uncached:
+                future.set_exception(e)
+            return
+        
+        for (_, future, key), text in zip(uncached, texts):
+            if key and text:
+                self._store_cache(key, text)
+            future.set_result(text)
     
-    def process_audio_segments(self, segment_files: List[str]) -> Dict[int, str]:
+    def process_audio_segments(self, segment_files: List[str],
+                               result_callback: Optional[Callable[[int, Optional[str]], None]] = None) -> Dict[int, str]:
         """
         使用并行处理识别多个音频片段
         
         Args:
             segment_files: 音频片段文件名列表
+            result_callback: 可选的结果回调 (片段索引, 识别文本)，每个片段结束时按完成顺序调用，
+                识别失败或被取消时文本为None；提供时结果直接交给回调，不再保存在返回的字典中
             
         Returns:
             识别结果字典，格式为 {片段索引: 识别文本}
         """
+        segment_results: Dict[int, str] = {}
+        success_count = 0
         try:
-            segment_results: Dict[int, str] = {}
             
             logging.info(f"开始多线程识别 {len(segment_files)} 个音频片段...")
             
             # 更新初始进度
-            if self.progress_callback:
-                try:
-                    self.progress_callback( 0, len(segment_files), "开始识别片段")
-                except Exception as e:
-                    logging.warning(f"进度回调出错: {str(e)}")
+            self._report_progress(0, len(segment_files), "开始识别片段", force=True)
             
-            # 跟踪任务开始时间和最大执行时间
-            task_start_times = {}
+            # 最大任务执行时间及检查间隔
             MAX_TASK_TIME = 60  # 最大任务执行时间(秒)
             PROGRESS_UPDATE_INTERVAL = 2  # 进度更新间隔(秒)
             STALLED_CHECK_INTERVAL = 10  # 卡住任务检查间隔(秒)
+            WAIT_INTERVAL = 0.5  # 无任务完成时的最长等待时间(秒)，决定中断和超时检查的响应速度
             
             # 记录总体开始时间，设置总超时
             overall_start_time = time.time()
             OVERALL_TIMEOUT = max(len(segment_files) * 10, 300)  # 总超时时间(秒)，至少5分钟
                 
-            # 使用线程池并行处理音频片段
-            with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                # 创建任务字典，映射片段索引和对应的Future对象
-                future_to_segment = {}
+            # 使用线程池并行处理音频片段，线程池在同一调用线程的多次调用间复用，结束时不关闭
+            executor = self._get_executor()
+            # 提交所有任务，得到映射Future对象到片段索引的任务字典
+            future_to_segment = self._submit_segments(executor, segment_files)
+            task_start_times = dict.fromkeys(future_to_segment, time.time())
+            
+            # 收集结果，并添加中断检查
+            try:
+                completed_count = 0
+                # 集合保存活动任务，删除和成员判断都是O(1)
+                active_futures = set(future_to_segment)
+                last_progress_update = time.time()
+                last_stalled_check = time.time()
                 
-                # 提交所有任务
-                for i, segment_file in enumerate(segment_files):
-                    future = executor.submit(self.recognize_audio, 
-                                            os.path.join(self.temp_segments_dir, segment_file))
-                    future_to_segment[future] = (i, segment_file)
-                    task_start_times[future] = time.time()
+                # 任务完成(或被取消)时由回调放入队列，主循环只处理新完成的任务，
+                # 不必每轮逐个检查所有任务的done()状态
+                done_queue: "queue.Queue[concurrent.futures.Future]" = queue.Queue()
+                for future in active_futures:
+                    future.add_done_callback(done_queue.put)
                 
-                # 收集结果，并添加中断检查
-                try:
-                    completed_count = 0
-                    active_futures = list(future_to_segment.keys())
-                    last_progress_update = time.time()
-                    last_stalled_check = time.time()
+                # 只要还有活动任务且未收到中断信号且未超时
+                while active_futures and not self.interrupt_received:
+                    # 检查总体超时
+                    if time.time() - overall_start_time > OVERALL_TIMEOUT:
+                        logging.warning(f"总体处理时间超过 {OVERALL_TIMEOUT}秒，强制结束...")
+                        break
                     
-                    # 只要还有活动任务且未收到中断信号且未超时
-                    while active_futures and not self.interrupt_received:
-                        # 检查总体超时
-                        if time.time() - overall_start_time > OVERALL_TIMEOUT:
-                            logging.warning(f"总体处理时间超过 {OVERALL_TIMEOUT}秒，强制结束...")
-                            for future in active_futures:
-                                future.cancel()
-                            break
+                    # 等待下一个完成的任务，超时后照常执行周期性检查和中断检查，
+                    # 然后取出此刻已在队列中的其余任务一并处理
+                    done_futures = []
+                    try:
+                        done_futures.append(done_queue.get(timeout=WAIT_INTERVAL))
+                        while True:
+                            done_futures.append(done_queue.get_nowait())
+                    except queue.Empty:
+                        pass
+                    
+                    # 处理已完成的任务
+                    for future in done_futures:
+                        # 跳过已按卡住或超时处理过的取消任务
+                        if future not in active_futures:
+                            continue
+                        i, segment_file = future_to_segment[future]
+                        active_futures.discard(future)
+                        completed_count += 1
+                        
+                        try:
+                            # future已完成，result()不会阻塞
+                            text = future.result()
+                            
+                            if text:
+                                success_count += 1
+                                if result_callback is None:
+                                    segment_results[i] = text
+                                # 惰性格式化，未开启DEBUG日志时不拼接字符串
+                                logging.debug("  ├─ 成功识别: %s", segment_file)
+                            else:
+                                logging.warning(f"  ├─ 识别失败: {segment_file}")
+                            
+                            # 更新进度，状态文本在回调确实执行时才生成
+                            self._report_progress(
+                                completed_count, len(segment_files),
+                                lambda: f"{completed_count}/{len(segment_files)} 片段完成 (成功识别 {success_count})" if text
+                                else f"{completed_count}/{len(segment_files)} 片段完成 (失败 {completed_count - success_count})"
+                            )
+                                
+                        except Exception as exc:
+                            text = None
+                            logging.error(f"  ├─ 识别出错: {segment_file} - {str(exc)}")
+                            self._report_progress(completed_count, len(segment_files),
+                                                  f"{completed_count}/{len(segment_files)} 片段完成 (错误)")
+                        
+                        # 交出结果，失败的片段也要通知，以免阻塞按序输出
+                        if result_callback:
+                            result_callback(i, text)
                         
-                        # 检查任何已完成的任务
-                        done_futures = []
+                        # 清理任务计时器
+                        task_start_times.pop(future, None)
+                
+                    # 周期性更新进度，即使没有任务完成
+                    current_time = time.time()
+                    if current_time - last_progress_update > PROGRESS_UPDATE_INTERVAL:
+                        last_progress_update = current_time
+                        self._report_progress(
+                            completed_count, len(segment_files),
+                            f"{completed_count}/{len(segment_files)} 片段完成，{len(active_futures)} 个处理中..."
+                        )
+                    
+                    # 周期性检查卡住的任务
+                    if current_time - last_stalled_check > STALLED_CHECK_INTERVAL:
+                        last_stalled_check = current_time
+                        stalled_tasks = []
+                        
+                        # 检查所有活动任务是否运行时间过长
                         for future in active_futures:
-                            if future.done():
-                                done_futures.append(future)
+                            if future in task_start_times:
+                                task_time = current_time - task_start_times[future]
+                                if task_time > MAX_TASK_TIME:
+                                    i, segment_file = future_to_segment[future]
+                                    logging.warning(f"任务 {segment_file} 执行超过 {MAX_TASK_TIME}秒，强制取消")
+                                    stalled_tasks.append((future, i, segment_file))
                         
-                        # 处理已完成的任务
-                        for future in done_futures:
-                            i, segment_file = future_to_segment[future]
-                            active_futures.remove(future)
+                        # 处理卡住的任务
+                        for future, i, segment_file in stalled_tasks:
+                            # 取消任务
+                            future.cancel()
+                            
+                            # 从活动任务中删除该任务
+                            active_futures.discard(future)
+                            
+                            # 更新完成数量
                             completed_count += 1
+                            if result_callback:
+                                result_callback(i, None)
                             
-                            try:
-                                text = future.result(timeout=3)
-                                
-                                if text:
-                                    segment_results[i] = text
-                                    status_text = f"{completed_count}/{len(segment_files)} 片段完成 (成功识别 {len(segment_results)})"
-                                    logging.debug(f"  ├─ 成功识别: {segment_file}")
-                                else:
-                                    status_text = f"{completed_count}/{len(segment_files)} 片段完成 (失败 {completed_count - len(segment_results)})"
-                                    logging.warning(f"  ├─ 识别失败: {segment_file}")
-                                
-                                # 更新进度
-                                if self.progress_callback:
-                                    try:
-                                        self.progress_callback(
-                                            completed_count, 
-                                            len(segment_files), 
-                                            status_text
-                                        )
-                                    except Exception as e:
-                                        logging.warning(f"进度回调出错: {str(e)}")
-                                    
-                            except concurrent.futures.TimeoutError:
-                                logging.warning(f"  ├─ 识别结果获取超时: {segment_file}")
-                                if self.progress_callback:
-                                    try:
-                                        self.progress_callback(
-                                            completed_count, 
-                                            len(segment_files),
-                                            f"{completed_count}/{len(segment_files)} 片段完成 (超时 {segment_file})"
-                                        )
-                                    except Exception as e:
-                                        logging.warning(f"进度回调出错: {str(e)}")
-                            except Exception as exc:
-                                logging.error(f"  ├─ 识别出错: {segment_file} - {str(exc)}")
-                                if self.progress_callback:
-                                    try:
-                                        self.progress_callback(
-                                            completed_count, 
-                                            len(segment_files),
-                                            f"{completed_count}/{len(segment_files)} 片段完成 (错误)"
-                                        )
-                                    except Exception as e:
-                                        logging.warning(f"进度回调出错: {str(e)}")
+                            # 更新进度
+                            self._report_progress(completed_count, len(segment_files),
+                                                  f"{completed_count}/{len(segment_files)} 片段完成 (强制取消卡住任务)",
+                                                  force=True)
                             
                             # 清理任务计时器
-                            if future in task_start_times:
-                                del task_start_times[future]
+                            task_start_times.pop(future, None)
                     
-                        # 周期性更新进度，即使没有任务完成
-                        current_time = time.time()
-                        if current_time - last_progress_update > PROGRESS_UPDATE_INTERVAL and self.progress_callback:
-                            last_progress_update = current_time
-                            try:
-                                self.progress_callback(
-                                    completed_count,
-                                    len(segment_files),
-                                    f"{completed_count}/{len(segment_files)} 片段完成，{len(active_futures)} 个处理中..."
-                                )
-                            except Exception as e:
-                                logging.warning(f"进度回调出错: {str(e)}")
+                    # 如果只剩少量任务且已接近总超时，强制结束
+                    if len(active_futures) > 0:  # 避免除以零错误
+                        remaining_ratio = len(active_futures) / len(segment_files)
+                        time_ratio = (time.time() - overall_start_time) / OVERALL_TIMEOUT
                         
-                        # 周期性检查卡住的任务
-                        if current_time - last_stalled_check > STALLED_CHECK_INTERVAL:
-                            last_stalled_check = current_time
-                            stalled_tasks = []
-                            
-                            # 检查所有活动任务是否运行时间过长
-                            for future in list(active_futures):
-                                if future in task_start_times:
-                                    task_time = current_time - task_start_times[future]
-                                    if task_time > MAX_TASK_TIME:
-                                        i, segment_file = future_to_segment[future]
-                                        logging.warning(f"任务 {segment_file} 执行超过 {MAX_TASK_TIME}秒，强制取消")
-                                        stalled_tasks.append((future, i, segment_file))
-                            
-                            # 处理卡住的任务
-                            for future, i, segment_file in stalled_tasks:
-                                # 取消任务
+                        if remaining_ratio < 0.05 and time_ratio > 0.8:  # 剩余不到5%的任务且已用时超过80%
+                            logging.warning(f"只剩余 {len(active_futures)} 个任务但执行时间过长，强制完成...")
+                            for future in active_futures:
                                 future.cancel()
-                                
-                                # 从活跃列表中删除该任务
-                                if future in active_futures:
-                                    active_futures.remove(future)
-                                
-                                # 更新完成数量
+                                i, segment_file = future_to_segment[future]
+                                logging.warning(f"强制取消卡住的尾部任务: {segment_file}")
                                 completed_count += 1
-                                
-                                # 更新进度
-                                if self.progress_callback:
-                                    try:
-                                        self.progress_callback(
-                                            completed_count,
-                                            len(segment_files),
-                                            f"{completed_count}/{len(segment_files)} 片段完成 (强制取消卡住任务)"
-                                        )
-                                    except Exception as e:
-                                        logging.warning(f"进度回调出错: {str(e)}")
-                                
-                                # 清理任务计时器
-                                if future in task_start_times:
-                                    del task_start_times[future]
-                        
-                        # 如果只剩少量任务且已接近总超时，强制结束
-                        if len(active_futures) > 0:  # 避免除以零错误
-                            remaining_ratio = len(active_futures) / len(segment_files)
-                            time_ratio = (time.time() - overall_start_time) / OVERALL_TIMEOUT
-                            
-                            if remaining_ratio < 0.05 and time_ratio > 0.8:  # 剩余不到5%的任务且已用时超过80%
-                                logging.warning(f"只剩余 {len(active_futures)} 个任务但执行时间过长，强制完成...")
-                                for future in list(active_futures):
-                                    future.cancel()
-                                    i, segment_file = future_to_segment[future]
-                                    logging.warning(f"强制取消卡住的尾部任务: {segment_file}")
-                                    completed_count += 1
-                                active_futures = []
-                        
-                        # 避免CPU占用过高
-                        if not done_futures:
-                            time.sleep(0.1)
-                        
-                except KeyboardInterrupt:
-                    logging.warning("检测到用户中断，正在取消剩余任务...")
-                    executor.shutdown(wait=False, cancel_futures=True)
-                    self.interrupt_received = True
-                
-                # 如果因为中断或超时跳出循环，取消剩余任务
-                if active_futures:
-                    reason = "中断" if self.interrupt_received else "总超时"
-                    logging.warning(f"检测到{reason}，正在取消剩余 {len(active_futures)} 个任务...")
-                    for future in active_futures:
-                        future.cancel()
-                        
+                                if result_callback:
+                                    result_callback(i, None)
+                            active_futures.clear()
+                    
+            except KeyboardInterrupt:
+                logging.warning("检测到用户中断，正在取消剩余任务...")
+                self._discard_executor()
+                self.interrupt_received = True
+            
+            # 如果因为中断或超时跳出循环，取消剩余任务
+            if active_futures:
+                reason = "中断" if self.interrupt_received else "总超时"
+                logging.warning(f"检测到{reason}，正在取消剩余 {len(active_futures)} 个任务...")
+                # 关闭线程池并一次性丢弃队列中尚未开始的任务，下次调用时重新创建线程池；
+                # 批量模式下片段的Future不属于线程池，仍需逐个取消
+                self._discard_executor()
+                for future in active_futures:
+                    future.cancel()
+                    
         except KeyboardInterrupt:
             logging.warning("检测到用户中断，正在取消剩余任务...")
-            executor.shutdown(wait=False, cancel_futures=True)
+            self._discard_executor()
             self.interrupt_received = True
         
         # 完成识别阶段
-        success_count = len(segment_results)
         fail_count = len(segment_files) - success_count
         
-        # 报告最终状态
-        if self.progress_callback:
-            try:
-                self.progress_callback(
-                    len(segment_files),  # 将进度设为总数，表示完成
-                    len(segment_files),
-                    f"完成 - {success_count} 成功, {fail_count} 失败" + 
-                    (" (已中断)" if self.interrupt_received else "")
-                )
-            except Exception as e:
-                logging.warning(f"最终进度回调出错: {str(e)}")
+        # 报告最终状态，将进度设为总数，表示完成
+        self._report_progress(
+            len(segment_files),
+            len(segment_files),
+            f"完成 - {success_count} 成功, {fail_count} 失败" + 
+            (" (已中断)" if self.interrupt_received else ""),
+            force=True
+        )
         
         return segment_results
 
-    def transcribe_segments(self, segment_files: List[str]) -> Tuple[Dict[int, str], Dict]:
+    def transcribe_segments(self, segment_files: List[str],
+                            result_callback: Optional[Callable[[int, Optional[str]], None]] = None,
+                            partial_file: Optional[str] = None,
+                            index_offset: int = 0) -> Tuple[Dict[int, str], Dict]:
         """
         识别一组音频片段，包括重试机制
         
         Args:
             segment_files: 音频片段文件路径列表
+            result_callback: 可选的结果回调，见 process_audio_segments
+            partial_file: 已完成片段的结果日志(JSONL)，每个片段识别成功后立即追加一行；
+                再次调用时日志中已有的片段直接使用保存的结果，只识别缺失的片段。None表示不保存
+            index_offset: segment_files中第一个片段在整个文件中的索引，日志按该全局索引记录
             
         Returns:
             (识别结果字典, 统计信息)
         """
-        # 第一轮识别
-        segment_results = self.process_audio_segments(segment_files)
+        success_count = 0
+        segment_results: Dict[int, str] = {}
+        
+        def handle_result(index: int, text: Optional[str]):
+            nonlocal success_count
+            if text:
+                success_count += 1
+                if result_callback is None:
+                    segment_results[index] = text
+            if result_callback:
+                result_callback(index, text)
+        
+        # 之前运行中已识别的片段不再请求ASR
+        saved = self._load_partial_results(partial_file, index_offset, len(segment_files)) if partial_file else {}
+        pending = [i for i in range(len(segment_files)) if i not in saved]
+        if saved:
+            logging.info(f"使用已保存的 {len(saved)} 个片段结果，识别其余 {len(pending)} 个片段")
+        
+        partial_fp = None
+        if partial_file and pending:
+            try:
+                partial_fp = open(partial_file, 'a', encoding='utf-8', buffering=1)
+            except OSError as e:
+                logging.warning(f"无法打开片段结果日志，本次结果不会保存: {str(e)}")
+        
+        def handle_pending(position: int, text: Optional[str]):
+            index = pending[position]
+            if text and partial_fp is not None:
+                try:
+                    partial_fp.write(json.dumps({"i": index_offset + index, "text": text}, ensure_ascii=False) + '\n')
+                except OSError as e:
+                    logging.warning(f"写入片段结果日志失败: {str(e)}")
+            handle_result(index, text)
+        
+        try:
+            for index, text in saved.items():
+                handle_result(index, text)
+            # 第一轮识别
+            if pending:
+                self.process_audio_segments([segment_files[i] for i in pending], handle_pending)
+        finally:
+            if partial_fp is not None:
+                partial_fp.close()
         
         # 统计第一轮结果
         total_segments = len(segment_files)
-        success_count = len(segment_results)
         fail_count = total_segments - success_count
         stats = {
             'total': total_segments,
@@ -291,6 +596,37 @@ class TranscriptionManager:
         }
         
         return segment_results, stats
+    
+    @staticmethod
+    def _load_partial_results(partial_file: str, index_offset: int, count: int) -> Dict[int, str]:
+        """
+        读取片段结果日志中属于当前这组片段的结果
+        
+        Args:
+            partial_file: 片段结果日志路径
+            index_offset: 第一个片段的全局索引
+            count: 片段数
+            
+        Returns:
+            {组内片段索引: 识别文本}
+        """
+        results: Dict[int, str] = {}
+        try:
+            with open(partial_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        index, text = entry["i"] - index_offset, entry["text"]
+                    except (ValueError, TypeError, KeyError):
+                        # 写入中断时最后一行可能不完整
+                        continue
+                    if 0 <= index < count and text:
+                        results[index] = text
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logging.warning(f"读取片段结果日志失败: {str(e)}")
+        return results
 
     def _get_audio_duration_minutes(self, audio_path: str) -> float:
         """
@@ -302,8 +638,12 @@ class TranscriptionManager:
         Returns:
             音频时长（分钟）
         """
-        # 实际项目中需要调用音频处理库获取时长
-        # 例如使用 pydub, librosa 等
+        # 优先用ffprobe读取容器信息，不解码音频；ffprobe不可用或失败时才用pydub完整解码
+        try:
+            return AudioSplitter.probe_duration(audio_path) / 60.0
+        except (OSError, subprocess.SubprocessError, ValueError) as e:
+            logging.debug(f"ffprobe获取时长失败，改用pydub解码: {str(e)}")
+        
         from pydub import AudioSegment
         audio_duration = AudioSegment.from_file(audio_path).duration_seconds
         return audio_duration / 60.0
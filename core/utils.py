@@ -4,6 +4,7 @@ import json
 import os
 import sys
 import time
+import concurrent.futures
 from datetime import datetime
 
 def format_time_duration(seconds: float) -> str:
@@ -29,6 +30,26 @@ def format_time_duration(seconds: float) -> str:
     except Exception:
         return "未知时长"
 
+# 当前时间字符串缓存 (秒, 格式化结果)
+_now_str_cache = (0, "")
+
+def now_str() -> str:
+    """
+    获取当前时间字符串，格式为 YYYY-mm-dd HH:MM:SS
+    
+    同一秒内复用上一次的格式化结果，避免重复调用strftime
+    
+    Returns:
+        格式化后的时间字符串
+    """
+    global _now_str_cache
+    second = int(time.time())
+    cached_second, cached_str = _now_str_cache
+    if second != cached_second:
+        cached_str = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(second))
+        _now_str_cache = (second, cached_str)
+    return cached_str
+
 def load_json_file(file_path: str) -> Dict[str, Any]:
     """
     加载JSON文件，处理异常
@@ -47,10 +68,38 @@ def load_json_file(file_path: str) -> Dict[str, Any]:
         print(f"加载JSON文件失败: {str(e)}")
     return {}
 
+def load_json_records(file_path: str) -> Dict[str, Any]:
+    """
+    加载JSON记录快照，并按顺序合并追加日志(file_path + '.jsonl')中的记录
+    
+    Args:
+        file_path: JSON快照文件路径
+        
+    Returns:
+        合并后的记录字典，日志中靠后的记录覆盖靠前的记录
+    """
+    records = load_json_file(file_path)
+    try:
+        with open(file_path + '.jsonl', 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.update(json.loads(line))
+                except (ValueError, TypeError):
+                    # 写入中断时最后一行可能不完整，非对象的行同样跳过
+                    logging.warning(f"跳过损坏的记录行: {line[:80]}")
+    except FileNotFoundError:
+        pass
+    return records
+
 def save_json_file(file_path: str, data: Dict[str, Any]) -> bool:
     """
     保存数据到JSON文件
     
+    先在内存中序列化再原子替换目标文件，写入中途出错或进程被终止时原文件保持完整
+    
     Args:
         file_path: JSON文件路径
         data: 要保存的数据
@@ -59,13 +108,127 @@ def save_json_file(file_path: str, data: Dict[str, Any]) -> bool:
         是否保存成功
     """
     try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
+        write_text_atomic(file_path, json.dumps(data, indent=4, ensure_ascii=False))
         return True
     except Exception as e:
         logging.error(f"保存JSON文件出错: {str(e)}")
         return False
 
+class AtomicTextWriter:
+    """
+    流式原子写入文本文件：内容逐段编码写入同目录临时文件，
+    正常退出上下文时替换目标文件，出现异常时删除临时文件，原有文件保持不变
+    
+    用法:
+        with AtomicTextWriter(path) as writer:
+            writer.write(text)
+    """
+    
+    def __init__(self, file_path: str):
+        """
+        Args:
+            file_path: 目标文件路径
+        """
+        self.file_path = file_path
+        self.tmp_path = f"{file_path}.tmp"
+        self._fd: Optional[int] = None
+    
+    def __enter__(self) -> "AtomicTextWriter":
+        self._fd = os.open(self.tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        return self
+    
+    def write(self, text: str) -> None:
+        """
+        写入一段文本
+        
+        Args:
+            text: 要写入的文本
+        """
+        data = text.encode('utf-8')
+        written = os.write(self._fd, data)
+        if written == len(data):
+            return
+        
+        # 极少数情况下单次未写完，按剩余部分继续写入
+        data = memoryview(data)[written:]
+        while data:
+            written = os.write(self._fd, data)
+            data = data[written:]
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        fd, self._fd = self._fd, None
+        if exc_type is None:
+            try:
+                os.fsync(fd)
+            except BaseException:
+                os.close(fd)
+                os.unlink(self.tmp_path)
+                raise
+            os.close(fd)
+            os.replace(self.tmp_path, self.file_path)
+        else:
+            os.close(fd)
+            os.unlink(self.tmp_path)
+
+def write_text_atomic(file_path: str, text: str) -> None:
+    """
+    原子写入文本文件：一次编码后写入同目录临时文件，再替换目标文件，
+    写入过程中被中断时原有文件保持不变
+    
+    Args:
+        file_path: 目标文件路径
+        text: 要写入的文本
+    """
+    with AtomicTextWriter(file_path) as writer:
+        writer.write(text)
+
+def _unlink_quietly(path: str) -> None:
+    """删除文件，忽略错误"""
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+def fast_rmtree(path: str, max_workers: int = 8, parallel_threshold: int = 64) -> None:
+    """
+    删除目录树：用scandir遍历收集文件，文件较多时交给线程池并行删除，
+    最后自底向上删除目录。与shutil.rmtree(ignore_errors=True)一样忽略错误
+    
+    Args:
+        path: 要删除的目录
+        max_workers: 并行删除文件的线程数
+        parallel_threshold: 文件数达到此值时才使用线程池
+    """
+    dirs = []
+    files = []
+    stack = [path]
+    while stack:
+        current = stack.pop()
+        dirs.append(current)
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    else:
+                        files.append(entry.path)
+        except OSError:
+            continue
+    
+    if len(files) >= parallel_threshold:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            executor.map(_unlink_quietly, files)
+    else:
+        for file_path in files:
+            _unlink_quietly(file_path)
+    
+    # 先序遍历得到的目录倒序即为子目录在前
+    for dir_path in reversed(dirs):
+        try:
+            os.rmdir(dir_path)
+        except OSError:
+            pass
+
 class LogConfig:
     """日志配置管理类"""
     
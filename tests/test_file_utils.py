@@ -0,0 +1,111 @@
+"""
+测试原子写入和处理记录加载等文件工具函数
+"""
+import unittest
+import os
+import json
+import shutil
+import tempfile
+
+from core.utils import AtomicTextWriter, write_text_atomic, load_json_records
+
+
+class TestAtomicTextWriter(unittest.TestCase):
+    """测试流式原子写入"""
+    
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.temp_dir, "result.txt")
+    
+    def tearDown(self):
+        """测试后清理"""
+        shutil.rmtree(self.temp_dir)
+    
+    def _read(self) -> str:
+        """读取目标文件内容"""
+        with open(self.file_path, 'r', encoding='utf-8') as f:
+            return f.read()
+    
+    def test_replaces_file_on_success(self):
+        """测试正常退出时替换目标文件且不留下临时文件"""
+        write_text_atomic(self.file_path, "旧内容")
+        
+        with AtomicTextWriter(self.file_path) as writer:
+            writer.write("第一段")
+            writer.write("，第二段")
+            # 退出上下文前目标文件保持原有内容
+            self.assertEqual(self._read(), "旧内容")
+        
+        self.assertEqual(self._read(), "第一段，第二段")
+        self.assertFalse(os.path.exists(writer.tmp_path))
+    
+    def test_removes_tmp_file_on_error(self):
+        """测试出现异常时删除临时文件，原有文件保持不变"""
+        write_text_atomic(self.file_path, "旧内容")
+        
+        with self.assertRaises(RuntimeError):
+            with AtomicTextWriter(self.file_path) as writer:
+                writer.write("写了一半")
+                raise RuntimeError("写入中断")
+        
+        self.assertEqual(self._read(), "旧内容")
+        self.assertFalse(os.path.exists(writer.tmp_path))
+
+
+class TestLoadJsonRecords(unittest.TestCase):
+    """测试处理记录快照与追加日志的合并"""
+    
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.record_file = os.path.join(self.temp_dir, "processed_audio_files.json")
+    
+    def tearDown(self):
+        """测试后清理"""
+        shutil.rmtree(self.temp_dir)
+    
+    def _write_journal(self, *lines: str):
+        """按行写入追加日志"""
+        with open(self.record_file + '.jsonl', 'w', encoding='utf-8') as f:
+            f.write("".join(line + '\n' for line in lines))
+    
+    def test_journal_overrides_snapshot(self):
+        """测试日志中的记录合并到快照，靠后的记录覆盖靠前的记录"""
+        write_text_atomic(self.record_file, json.dumps({
+            "a.mp3": {"completed": False},
+            "b.mp3": {"completed": True},
+        }))
+        self._write_journal(
+            json.dumps({"a.mp3": {"completed": False, "processed_parts": [1]}}),
+            json.dumps({"c.mp3": {"completed": False}}),
+            json.dumps({"a.mp3": {"completed": True}}),
+        )
+        
+        records = load_json_records(self.record_file)
+        self.assertEqual(records, {
+            "a.mp3": {"completed": True},
+            "b.mp3": {"completed": True},
+            "c.mp3": {"completed": False},
+        })
+    
+    def test_skips_damaged_lines(self):
+        """测试跳过不完整的行和不是对象的行"""
+        self._write_journal(
+            json.dumps({"a.mp3": {"completed": True}}),
+            "[1, 2]",
+            "",
+            '{"b.mp3": {"compl',
+        )
+        
+        with self.assertLogs(level='WARNING'):
+            records = load_json_records(self.record_file)
+        self.assertEqual(records, {"a.mp3": {"completed": True}})
+    
+    def test_missing_files(self):
+        """测试快照和日志都不存在时返回空字典"""
+        self.assertEqual(load_json_records(self.record_file), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
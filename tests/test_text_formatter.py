@@ -0,0 +1,77 @@
+"""
+测试按序输出识别结果的OrderedSegmentWriter
+"""
+import unittest
+from typing import List
+
+from core.text_formatter import OrderedSegmentWriter
+
+
+class TestOrderedSegmentWriter(unittest.TestCase):
+    """测试片段结果按顺序流式输出"""
+    
+    def setUp(self):
+        """测试前准备"""
+        self.chunks: List[str] = []
+    
+    def _writer(self, total: int) -> OrderedSegmentWriter:
+        """创建不格式化文本的写入器，输出收集到self.chunks"""
+        return OrderedSegmentWriter(self.chunks.append, total, format_text=False)
+    
+    def test_out_of_order_results_written_in_order(self):
+        """测试乱序到达的结果按片段顺序输出"""
+        writer = self._writer(3)
+        
+        writer.add(2, "三")
+        writer.add(1, "二")
+        # 第0个片段未到达前不输出任何内容
+        self.assertEqual(self.chunks, [])
+        
+        writer.add(0, "一")
+        writer.close()
+        self.assertEqual("".join(self.chunks), "一\n\n二\n\n三")
+    
+    def test_contiguous_prefix_written_immediately(self):
+        """测试形成连续前缀的结果立即输出，不等待全部完成"""
+        writer = self._writer(3)
+        
+        writer.add(0, "一")
+        self.assertEqual(self.chunks, ["一"])
+        writer.add(1, "二")
+        self.assertEqual("".join(self.chunks), "一\n\n二")
+    
+    def test_failed_segments_skipped(self):
+        """测试识别失败和无法识别的片段被跳过，不留下多余的分隔符"""
+        writer = self._writer(4)
+        
+        writer.add(0, None)
+        writer.add(1, "二")
+        writer.add(2, "[无法识别的音频片段]")
+        writer.add(3, "四")
+        writer.close()
+        self.assertEqual("".join(self.chunks), "二\n\n四")
+    
+    def test_close_fills_gaps(self):
+        """测试close时缺失的片段按失败处理，其后已到达的结果照常输出"""
+        writer = self._writer(4)
+        
+        writer.add(0, "一")
+        writer.add(2, "三")
+        writer.add(3, "四")
+        self.assertEqual(self.chunks, ["一"])
+        
+        writer.close()
+        self.assertEqual("".join(self.chunks), "一\n\n三\n\n四")
+    
+    def test_timestamps_use_global_index(self):
+        """测试时间戳按start_index换算为整个音频中的时间"""
+        writer = OrderedSegmentWriter(self.chunks.append, 1, include_timestamps=True,
+                                      segment_length=30, start_index=2)
+        
+        writer.add(0, "一")
+        writer.close()
+        self.assertIn("01:00", "".join(self.chunks))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,201 @@
+"""
+测试转录管理器按片段内容缓存识别结果，以及中断后按片段结果日志续传
+"""
+import unittest
+import os
+import shutil
+import tempfile
+from typing import List, Optional
+
+from core.transcription_manager import TranscriptionManager
+
+
+class FakeASRManager:
+    """模拟ASR管理器，记录实际发起识别的片段"""
+    
+    def __init__(self, fingerprint: str = "default"):
+        """
+        Args:
+            fingerprint: 模拟的服务配置标识
+        """
+        self.fingerprint = fingerprint
+        self.call_history: List[str] = []
+    
+    def cache_fingerprint(self) -> str:
+        """返回服务配置标识"""
+        return self.fingerprint
+    
+    def recognize_audio(self, audio_path: str, audio_data: Optional[bytes] = None) -> Optional[str]:
+        """按片段内容返回识别结果，内容为fail时模拟识别失败"""
+        self.call_history.append(os.path.basename(audio_path))
+        if audio_data is None:
+            with open(audio_path, 'rb') as f:
+                audio_data = f.read()
+        if audio_data == b"fail":
+            return None
+        return f"识别:{audio_data.decode('utf-8')}"
+    
+    def recognize_batch(self, audio_paths: List[str]) -> List[Optional[str]]:
+        """逐个识别一批片段"""
+        return [self.recognize_audio(path) for path in audio_paths]
+
+
+class TestTranscriptionCache(unittest.TestCase):
+    """测试识别结果缓存"""
+    
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_file = os.path.join(self.temp_dir, "asr_segment_cache.jsonl")
+        self.managers: List[TranscriptionManager] = []
+    
+    def tearDown(self):
+        """测试后清理"""
+        for manager in self.managers:
+            manager.close()
+        shutil.rmtree(self.temp_dir)
+    
+    def _segments(self, *contents: str) -> List[str]:
+        """创建内容分别为contents的片段文件，返回相对临时目录的文件名"""
+        names = []
+        for i, content in enumerate(contents):
+            name = f"segment_{len(os.listdir(self.temp_dir))}_{i}.wav"
+            with open(os.path.join(self.temp_dir, name), 'w', encoding='utf-8') as f:
+                f.write(content)
+            names.append(name)
+        return names
+    
+    def _manager(self, asr_manager: FakeASRManager, **kwargs) -> TranscriptionManager:
+        """创建启用缓存的转录管理器"""
+        manager = TranscriptionManager(asr_manager, self.temp_dir, max_workers=1,
+                                       cache_file=self.cache_file, **kwargs)
+        self.managers.append(manager)
+        return manager
+    
+    def test_cached_results_reused_across_runs(self):
+        """测试重新处理时内容相同的片段直接使用缓存结果"""
+        segments = self._segments("一", "二")
+        self._manager(FakeASRManager()).process_audio_segments(segments)
+        
+        asr = FakeASRManager()
+        # 文件名不同但内容相同的片段同样命中缓存
+        results = self._manager(asr).process_audio_segments(self._segments("二", "一"))
+        self.assertEqual(results, {0: "识别:二", 1: "识别:一"})
+        self.assertEqual(asr.call_history, [])
+    
+    def test_batch_mode_uses_cache(self):
+        """测试批量识别时只把未命中缓存的片段交给ASR"""
+        self._manager(FakeASRManager()).process_audio_segments(self._segments("一"))
+        
+        asr = FakeASRManager()
+        segments = self._segments("一", "二")
+        results = self._manager(asr, batch_size=2).process_audio_segments(segments)
+        self.assertEqual(results, {0: "识别:一", 1: "识别:二"})
+        self.assertEqual(asr.call_history, [segments[1]])
+    
+    def test_different_service_config_not_shared(self):
+        """测试服务配置不同时不使用其他配置的缓存结果"""
+        self._manager(FakeASRManager("jianying")).process_audio_segments(self._segments("一"))
+        
+        asr = FakeASRManager("bcut")
+        self._manager(asr).process_audio_segments(self._segments("一"))
+        self.assertEqual(len(asr.call_history), 1)
+    
+    def test_failed_results_not_cached(self):
+        """测试识别失败的片段不写入缓存，下次仍会重新识别"""
+        self._manager(FakeASRManager()).process_audio_segments(self._segments("fail"))
+        
+        asr = FakeASRManager()
+        self._manager(asr).process_audio_segments(self._segments("fail"))
+        self.assertEqual(len(asr.call_history), 1)
+    
+    def test_load_bounds_and_compacts_cache_file(self):
+        """测试加载时只保留最新的条目，并压缩缓存文件"""
+        self._manager(FakeASRManager()).process_audio_segments(self._segments("一", "二", "三"))
+        with open(self.cache_file, 'a', encoding='utf-8') as f:
+            f.write('{"broken\n')
+        
+        manager = self._manager(FakeASRManager(), cache_max_entries=2)
+        self.assertEqual(sorted(manager._cache.values()), ["识别:三", "识别:二"])
+        with open(self.cache_file, 'r', encoding='utf-8') as f:
+            self.assertEqual(len(f.readlines()), 2)
+    
+    def test_cache_disabled_by_default(self):
+        """测试未指定缓存文件时不缓存识别结果"""
+        manager = TranscriptionManager(FakeASRManager(), self.temp_dir, max_workers=1)
+        self.managers.append(manager)
+        manager.process_audio_segments(self._segments("一"))
+        self.assertFalse(os.path.exists(self.cache_file))
+
+
+
+class TestPartialResults(unittest.TestCase):
+    """测试片段结果日志：中断后再次处理时只识别缺失的片段"""
+    
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.partial_file = os.path.join(self.temp_dir, "audio.partial.jsonl")
+        self.segments = []
+        for i, content in enumerate(["一", "fail", "三", "四"]):
+            name = f"segment_{i}.wav"
+            with open(os.path.join(self.temp_dir, name), 'w', encoding='utf-8') as f:
+                f.write(content)
+            self.segments.append(name)
+        self.managers: List[TranscriptionManager] = []
+    
+    def tearDown(self):
+        """测试后清理"""
+        for manager in self.managers:
+            manager.close()
+        shutil.rmtree(self.temp_dir)
+    
+    def _manager(self, asr_manager: FakeASRManager) -> TranscriptionManager:
+        """创建不启用缓存的转录管理器"""
+        manager = TranscriptionManager(asr_manager, self.temp_dir, max_workers=1)
+        self.managers.append(manager)
+        return manager
+    
+    def test_only_missing_segments_recognized(self):
+        """测试再次处理时已保存的片段直接使用，只识别上次失败的片段"""
+        self._manager(FakeASRManager()).transcribe_segments(self.segments, partial_file=self.partial_file)
+        
+        # 第二次运行时失败的片段已可识别
+        with open(os.path.join(self.temp_dir, self.segments[1]), 'w', encoding='utf-8') as f:
+            f.write("二")
+        asr = FakeASRManager()
+        results, stats = self._manager(asr).transcribe_segments(self.segments, partial_file=self.partial_file)
+        
+        self.assertEqual(asr.call_history, [self.segments[1]])
+        self.assertEqual(results, {0: "识别:一", 1: "识别:二", 2: "识别:三", 3: "识别:四"})
+        self.assertEqual(stats['success_count'], 4)
+    
+    def test_index_offset_selects_part(self):
+        """测试按全局索引记录，各部分只使用自己范围内的结果"""
+        self._manager(FakeASRManager()).transcribe_segments(
+            self.segments[2:], partial_file=self.partial_file, index_offset=2)
+        
+        asr = FakeASRManager()
+        results, _ = self._manager(asr).transcribe_segments(
+            self.segments[:2], partial_file=self.partial_file, index_offset=0)
+        self.assertEqual(asr.call_history, self.segments[:2])
+        self.assertEqual(results, {0: "识别:一"})
+        
+        asr = FakeASRManager()
+        results, _ = self._manager(asr).transcribe_segments(
+            self.segments[2:], partial_file=self.partial_file, index_offset=2)
+        self.assertEqual(asr.call_history, [])
+        self.assertEqual(results, {0: "识别:三", 1: "识别:四"})
+    
+    def test_saved_results_passed_to_callback(self):
+        """测试使用结果回调时已保存的片段同样交给回调"""
+        self._manager(FakeASRManager()).transcribe_segments(self.segments, partial_file=self.partial_file)
+        
+        received = {}
+        self._manager(FakeASRManager()).transcribe_segments(
+            self.segments, result_callback=received.__setitem__, partial_file=self.partial_file)
+        self.assertEqual(received, {0: "识别:一", 1: None, 2: "识别:三", 3: "识别:四"})
+
+
+if __name__ == '__main__':
+    unittest.main()